@@ -0,0 +1,65 @@
+from os.path import splitext
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+import ModelIO
+from ModelFile import MODEL_EXTENSION
+
+#	Okna dialogowe interfejsu graficznego nad funkcjami ModelIO.
+
+def export_model(parent, patterns, model):
+	"""Pyta o plik i eksportuje do niego model z wzorcami"""
+	if not patterns or not model:
+		QMessageBox.warning(parent, "Błąd", "Brak wzorców lub modelu do eksportu")
+		return False
+	
+	try:
+		# Wybierz plik do zapisu
+		file_path, _ = QFileDialog.getSaveFileName(
+			parent,
+			"Zapisz model",
+			"",
+			f"Model files (*{MODEL_EXTENSION});;Pickle files (*.pkl);;All files (*.*)"
+		)
+		
+		if not file_path:
+			return False
+		
+		# Dodaj rozszerzenie formatu binarnego jeśli nie ma żadnego rozszerzenia
+		if not splitext(file_path)[1]:
+			file_path += MODEL_EXTENSION
+		
+		ModelIO.save_model(file_path, patterns, model)
+		
+		QMessageBox.information(parent, "Sukces", "Model został zapisany pomyślnie")
+		return True
+			
+	except Exception as e:
+		QMessageBox.critical(parent, "Błąd", f"Nie udało się zapisać modelu:\n{str(e)}")
+		return False
+
+def import_model(parent):
+	"""Pyta o plik i wczytuje z niego słownik modelu"""
+	try:
+		# Wybierz plik do wczytania
+		file_path, _ = QFileDialog.getOpenFileName(
+			parent,
+			"Wybierz plik modelu",
+			"",
+			f"Model files (*{MODEL_EXTENSION} *.pkl);;All files (*.*)"
+		)
+		
+		if not file_path:
+			return None
+		
+		model_data = ModelIO.load_model_data(file_path)
+		
+		QMessageBox.information(parent, "Sukces", "Model został wczytany pomyślnie")
+		return model_data
+		
+	except Exception as e:
+		QMessageBox.critical(parent, "Błąd", f"Nie udało się wczytać modelu:\n{str(e)}")
+		return None
+
+if __name__ == "__main__":
+	import app
+	app.main()
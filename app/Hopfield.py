@@ -1,20 +1,51 @@
+import itertools
+import time
+
 import numpy as np
 
+from RecallHistory import RecallHistory
+from WeightStorage import STORAGES, row_tiles
+
+# Pola lokalne bliższe zeru niż ta wartość traktowane są jako remis (neuron
+# przyjmuje 1), żeby o decyzji nie decydowały błędy zaokrągleń wag float64
+FIELD_TIE_TOL = 1e-9
+
+# Wzorzec, którego reszta względem przestrzeni zapamiętanych wzorców ma
+# kwadrat normy mniejszy niż PROJECTION_TOL * N, nie zmienia wag reguły rzutowania
+PROJECTION_TOL = 1e-9
+
+LEARNING_RULES = ('hebbian', 'projection')
+
+# Domyślna liczba wzorców przetwarzanych naraz podczas uczenia
+TRAIN_CHUNK_SIZE = 1024
+
+# Fazy odtwarzania mierzone dla obserwatora: losowanie kolejności neuronów,
+# pola lokalne (mnożenia przez wagi i ich aktualizacje) oraz energia
+RECALL_PHASES = ('permutation_time', 'field_time', 'energy_time')
+
 class Hopfield():
 	"""
 	Implementacja sieci Hopfielda.
 
 	Attributes
 	----------
+	storage : DenseWeights, MemmapWeights, PackedWeights, LowRankWeights or SparseWeights
+		Magazyn wag z jądrami mnożenia macierz-wektor.
 	weights : ndarray
-		Dwuwymiarowa macierz wag połączeń neuronów.
+		Dane wag z magazynu - macierz (N, N), spakowany górny trójkąt lub
+		macierz wzorców (N, P).
+		Dla typów innych niż float64 przechowuje nieskalowane liczniki Hebba.
+	weight_scale : float
+		Mnożnik wag - rzeczywiste wagi to weight_scale * weights.
 	biases : ndarray
 		Jednowymiarowa macierz wyrazów wolnych.
 	size : int
 		Rozmiar sieci (liczba neuronów).
+	pattern_count : int
+		Liczba wzorców, na których wytrenowano sieć.
 	"""
 
-	def __init__(self, size, weights=None, biases=None):
+	def __init__(self, size, weights=None, biases=None, pattern_count=0, weight_dtype=None, weight_scale=1.0, storage='dense', learning_rule='hebbian'):
 		"""
 		Inicjalizuje sieć Hopfielda.
 
@@ -26,38 +57,360 @@ class Hopfield():
 			Macierz wag. Jeśli None, inicjalizowana zerami.
 		biases : ndarray, optional
 			Wektor biasów. Jeśli None, inicjalizowany zerami.
+		pattern_count : int, default 0
+			Liczba wzorców, na których wytrenowano podane wagi. Potrzebna
+			do przyrostowego dodawania i usuwania wzorców.
+		weight_dtype : dtype, optional
+			Typ macierzy wag. Domyślnie typ podanych wag lub float64.
+			Dla typów całkowitych (int8, int16, int32) i float32 sieć
+			przechowuje nieskalowane liczniki wzorców, a skala 1/P trafia
+			do weight_scale.
+		weight_scale : float, default 1.0
+			Mnożnik podanych wag.
+		storage : {'dense', 'packed', 'lowrank'} or storage object, default 'dense'
+			'dense' - pełna macierz N×N.
+			'packed' - symetryczny górny trójkąt bez przekątnej (połowa
+			pamięci). Podane wagi mogą być pełną macierzą lub już spakowane.
+			'lowrank' - tylko macierz wzorców (N, P), wagi Hebba liczone
+			w przestrzeni wzorców. Podane wagi to macierz wzorców (N, P).
+			Można też podać gotowy obiekt magazynu, np. MemmapWeights z wagami
+			w pliku mapowanym w pamięć lub SparseWeights z rzadkimi
+			połączeniami - wtedy weights i weight_dtype są pomijane.
+		learning_rule : {'hebbian', 'projection'}, default 'hebbian'
+			'hebbian' - reguła Hebba.
+			'projection' - reguła rzutowania (pseudoodwrotności), wagi to
+			rzut na przestrzeń rozpiętą przez wzorce. Wymaga pełnej macierzy
+			float64, nie obsługuje usuwania wzorców.
 		"""
+		if learning_rule not in LEARNING_RULES:
+			raise ValueError(f"Nieznana reguła uczenia: {learning_rule}")
+		if isinstance(storage, str) and storage not in STORAGES:
+			raise ValueError(f"Nieznany magazyn wag: {storage}")
+
 		self.size = size
+		self.pattern_count = pattern_count
+		self.weight_scale = weight_scale
+		self.learning_rule = learning_rule
 		
-		if weights is not None and biases is not None:
-			self.weights = weights
+		if not isinstance(storage, str):
+			self.storage = storage
+			self.biases = biases if biases is not None else np.zeros(size)
+		elif weights is not None and biases is not None:
+			self.storage = STORAGES[storage](size, weights, weight_dtype)
 			self.biases = biases
 		else:
-			self.weights = np.zeros((size, size))
+			self.storage = STORAGES[storage](size, dtype=weight_dtype)
 			self.biases = np.zeros(size)
 
-	def train(self, patterns):
+		# Dla float64 wagi są przeskalowane, dla pozostałych typów to liczniki
+		self.stores_counts = self.storage.dtype != np.float64
+
+		if learning_rule == 'projection' and (self.storage.kind != 'dense' or self.stores_counts):
+			raise ValueError("Reguła rzutowania wymaga pełnej macierzy wag float64")
+
+	@property
+	def weights(self):
+		"""Dane wag z magazynu"""
+		return self.storage.data
+
+	def train(self, patterns, chunk_size=TRAIN_CHUNK_SIZE, progress=None, observer=None):
 		"""
 		Uczy sieć na podstawie listy wzorców.
 
+		Wagi liczone są iloczynem macierzy ułożonych wzorców (macierz
+		Grama) w kafelkach wierszy, zamiast sumowania iloczynów zewnętrznych.
+		Wzorce przetwarzane są porcjami po chunk_size, więc źródłem może być
+		dowolny iterator (np. generator czytający z dysku), a zużycie pamięci
+		nie zależy od liczby wzorców. Liczniki są sumowane dokładnie, więc
+		wynik nie zależy od podziału na porcje. Błąd w źródle o znanej
+		długości (zły rozmiar wzorca, przekroczony zakres liczników) nie
+		zmienia sieci. Po błędzie w dalszej porcji iteratora sieć jest
+		spójna i zapamiętuje wzorce z porcji sprzed błędu.
+
+		Parameters
+		----------
+		patterns : list of ndarray, PatternSet or iterable
+			Wzorce do zapamiętania z wartościami 1/-1 o tym samym rozmiarze.
+			Elementy iteratora mogą być pojedynczymi wzorcami lub porcjami
+			wzorców o kształcie (k, N) albo (k, wys, szer).
+		chunk_size : int, default TRAIN_CHUNK_SIZE
+			Liczba wzorców w jednej porcji.
+		progress : callable, optional
+			Wywoływana po każdej porcji jako progress(processed, total), gdzie
+			total to liczba wzorców lub None dla iteratora.
+		observer : Metrics.Observer, optional
+			Obserwator dostający czasy kolejnych porcji i podsumowanie.
+		"""
+		chunks = self._pattern_chunks(patterns, chunk_size)
+		first = next(chunks, None)
+		if first is None:
+			raise ValueError("Brak wzorców")
+
+		total = self._progress_total(patterns)
+		if total is not None:
+			self._check_source(patterns, total)
+
+		self._update_patterns(itertools.chain([first], chunks), 1, total, progress, observer, replace=True)
+
+	def add_patterns(self, patterns, chunk_size=TRAIN_CHUNK_SIZE, progress=None, observer=None):
+		"""
+		Dodaje wzorce do wytrenowanej sieci poprawką rzędu k.
+
+		Dla reguły rzutowania każdy wzorzec dodaje poprawkę rzędu 1 metodą
+		Grevillea, bez odwracania macierzy.
+
+		Parameters
+		----------
+		patterns : list of ndarray, PatternSet or iterable
+			Nowe wzorce z wartościami 1/-1, jak w train.
+		chunk_size : int, default TRAIN_CHUNK_SIZE
+			Liczba wzorców w jednej porcji.
+		progress : callable, optional
+			Funkcja postępu, jak w train.
+		observer : Metrics.Observer, optional
+			Obserwator uczenia, jak w train.
+		"""
+		chunks = self._pattern_chunks(patterns, chunk_size)
+		first = next(chunks, None)
+		if first is None:
+			raise ValueError("Brak wzorców")
+
+		total = self._progress_total(patterns)
+		if total is not None:
+			self._check_source(patterns, self.pattern_count + total)
+
+		self._update_patterns(itertools.chain([first], chunks), 1, total, progress, observer)
+
+	def remove_patterns(self, patterns):
+		"""
+		Usuwa wzorce z wytrenowanej sieci poprawką rzędu k.
+
+		Parameters
+		----------
+		patterns : list of ndarray or PatternSet
+			Lista wzorców, na których sieć była wcześniej uczona.
+		"""
+		matrix = self._pattern_matrix(patterns)
+		if len(matrix) > self.pattern_count:
+			raise ValueError("Nie można usunąć więcej wzorców niż zapamiętano")
+		if self.learning_rule == 'projection':
+			raise ValueError("Reguła rzutowania nie obsługuje usuwania wzorców")
+
+		self._update_patterns([matrix], -1, len(matrix))
+
+	def _update_patterns(self, chunks, sign, total=None, progress=None, observer=None, replace=False):
+		"""
+		Przeskalowuje wagi i dodaje (sign=1) lub odejmuje (sign=-1) wzorce.
+
+		Wagi Hebba są na czas aktualizacji sprowadzane do nieskalowanych
+		liczników, do których dodawane są macierze Grama kolejnych porcji.
+		Czas porcji nie obejmuje jej wczytania (load_time w rekordzie).
+		replace=True zastępuje poprzednie wzorce (train).
+
+		Rozmiar wzorców porcji sprawdza _pattern_chunks, a zakres liczników
+		jest sprawdzany przed dodaniem porcji, więc wagi zmienia dopiero
+		pierwsza poprawna porcja. Błąd w dalszej porcji kończy aktualizację
+		na porcjach już dodanych - stan sprzed aktualizacji nie jest
+		kopiowany, aby pamięć nie zależała od rozmiaru wag i liczby wzorców.
+		Źródło o znanej długości (total) sprawdza wcześniej _check_source.
+		"""
+		started = time.perf_counter()
+		chunk_times = []
+		old_count = 0 if replace else self.pattern_count
+		count = old_count
+		bias_sum = np.zeros(self.size)
+		updating = False
+
+		try:
+			ready = time.perf_counter()
+			for matrix in chunks:
+				chunk_start = time.perf_counter()
+				self._check_count_range(count + sign * len(matrix))
+
+				if not updating:
+					if replace:
+						self.storage.clear()
+						self.biases.fill(0)
+					elif self.learning_rule == 'hebbian' and not self.stores_counts:
+						# Wagi float64 wracają do skali liczników, liczniki zmieniają się bez skalowania
+						self.storage.data *= old_count
+					updating = True
+
+				if self.learning_rule == 'projection':
+					for pattern in matrix:
+						self._add_projection(pattern)
+				else:
+					self.storage.add_gram(matrix, sign)
+
+				count += sign * len(matrix)
+				bias_sum += sign * np.sum(matrix, axis=0)
+				if progress is not None:
+					progress(abs(count - old_count), total)
+
+				if observer is not None:
+					chunk_times.append(time.perf_counter() - chunk_start)
+					observer.train_chunk({
+						'chunk': len(chunk_times),
+						'patterns': len(matrix),
+						'load_time': chunk_start - ready,
+						'time': chunk_times[-1],
+						'pattern_count': count,
+					})
+				ready = time.perf_counter()
+		finally:
+			if updating:
+				self._finish_update(old_count, count, bias_sum)
+
+		if observer is not None:
+			observer.train_finished({
+				'chunks': len(chunk_times),
+				'patterns': abs(count - old_count),
+				'time': sum(chunk_times),
+				'total_time': time.perf_counter() - started,
+				'pattern_count': count,
+			})
+
+	def merge_counts(self, counts, bias_sum, pattern_count):
+		"""
+		Dodaje nieskalowane liczniki Hebba policzone poza siecią.
+
+		Liczniki i sumy wzorców są całkowite, więc wynik jest identyczny
+		z uczeniem tych samych wzorców przez add_patterns, niezależnie od
+		kolejności sumowania częściowych macierzy Grama.
+
 		Parameters
 		----------
-		patterns : list of ndarray
-			Lista wzorców do zapamiętania. Każdy wzorzec to tablica numpy
-			z wartościami 1/-1 o tym samym rozmiarze.
+		counts : ndarray
+			Suma macierzy Grama wzorców w formacie danych magazynu wag.
+		bias_sum : ndarray
+			Suma wzorców (N,).
+		pattern_count : int
+			Liczba wzorców.
+		"""
+		if self.learning_rule != 'hebbian':
+			raise ValueError("Liczniki można scalać tylko dla reguły Hebba")
+
+		old_count = self.pattern_count
+		count = old_count + pattern_count
+		self._check_count_range(count)
+
+		if not self.stores_counts:
+			self.storage.data *= old_count
+		self.storage.data += counts.astype(self.storage.dtype, copy=False)
+
+		self._finish_update(old_count, count, bias_sum)
+
+	def _finish_update(self, old_count, count, bias_sum):
+		"""Kończy aktualizację liczników: przekątna, biasy i skala wag."""
+		if count == 0:
+			self.storage.clear()
+			self.biases.fill(0)
+			self._set_pattern_count(0)
+			return
+
+		if self.learning_rule == 'hebbian':
+			self.storage.zero_diagonal()
+
+		self.biases *= old_count
+		self.biases += bias_sum
+		self.biases /= count
+
+		self._set_pattern_count(count)
+
+	def _pattern_chunks(self, patterns, chunk_size):
+		"""Dzieli źródło wzorców na macierze (k, N) float64 o k około chunk_size."""
+		if chunk_size < 1:
+			raise ValueError("Rozmiar porcji musi być dodatni")
+
+		# Listy, tablice i PatternSet dzielone są wycinkami
+		if hasattr(patterns, '__len__') and hasattr(patterns, '__getitem__'):
+			for start in range(0, len(patterns), chunk_size):
+				yield self._pattern_matrix(patterns[start:start + chunk_size])
+			return
+
+		pending, pending_count = [], 0
+		for item in patterns:
+			item = np.asarray(item, dtype=float)
+			if item.size == 0 or item.size % self.size:
+				raise ValueError(f"Wzorce muszą mieć {self.size} elementów")
+
+			pending.append(item.reshape(-1, self.size))
+			pending_count += len(pending[-1])
+			if pending_count >= chunk_size:
+				yield np.concatenate(pending)
+				pending, pending_count = [], 0
+
+		if pending:
+			yield np.concatenate(pending)
+
+	def _check_source(self, patterns, count):
 		"""
-		self.weights.fill(0)
-		self.biases.fill(0)
+		Sprawdza źródło o znanej długości przed zmianą wag.
+
+		count to liczba wzorców sieci po aktualizacji.
+		"""
+		self._check_count_range(count)
+
+		if isinstance(patterns, np.ndarray):
+			valid = len(patterns) == 0 or patterns[0].size == self.size
+		elif isinstance(getattr(patterns, 'size', None), int):
+			# PatternSet - wszystkie wzorce mają ten sam rozmiar
+			valid = patterns.size == self.size
+		else:
+			valid = all(np.size(pattern) == self.size for pattern in patterns)
+
+		if not valid:
+			raise ValueError(f"Wzorce muszą mieć {self.size} elementów")
+
+	@staticmethod
+	def _progress_total(patterns):
+		"""Zwraca liczbę wzorców w źródle lub None, gdy nie jest znana."""
+		if hasattr(patterns, '__len__') and hasattr(patterns, '__getitem__'):
+			return len(patterns)
+		return None
+
+	def _add_projection(self, pattern):
+		"""
+		Rozszerza rzut W o wzorzec: W += e e^T / (e^T e), gdzie e = x - W x.
+
+		Wzorzec zależny liniowo od zapamiętanych nie zmienia wag.
+		"""
+		weights = self.storage.data
+		residual = pattern - np.dot(weights, pattern)
+		norm = np.dot(residual, residual)
+		if norm < PROJECTION_TOL * self.size:
+			return
+
+		residual /= np.sqrt(norm)
+		for rows in row_tiles(self.size):
+			weights[rows] += np.outer(residual[rows], residual)
+
+	def _set_pattern_count(self, count):
+		"""Ustawia liczbę wzorców i skaluje wagi lub mnożnik wag."""
+		if self.stores_counts:
+			self.weight_scale = 1.0 / count if count else 1.0
+		elif count and self.learning_rule == 'hebbian':
+			self.storage.data /= count
+
+		self.pattern_count = count
+
+	def _check_count_range(self, count):
+		"""Sprawdza, czy liczniki wzorców zmieszczą się w typie wag."""
+		limit = self.storage.count_limit
+		if limit is not None and count > limit:
+			raise ValueError(f"Typ wag {self.storage.dtype} pozwala zapamiętać najwyżej {limit} wzorców")
 
-		for i in range(len(patterns)):
-			pattern = patterns[i].flatten()
-			self.weights += np.outer(pattern, pattern)
-			self.biases += pattern
+	def _pattern_matrix(self, patterns):
+		"""Układa wzorce (lista, tablica lub PatternSet) w macierz (P, N) typu float64."""
+		matrix = np.asarray(patterns, dtype=float)
+		if len(matrix) == 0:
+			raise ValueError("Brak wzorców")
 
-		np.fill_diagonal(self.weights, 0)
+		matrix = matrix.reshape(len(matrix), -1)
+		if matrix.shape[1] != self.size:
+			raise ValueError(f"Wzorce muszą mieć {self.size} elementów")
 
-		self.weights /= len(patterns)
-		self.biases /= len(patterns)
+		return matrix
 
 	def energy(self, state):
 		"""
@@ -73,15 +426,21 @@ class Hopfield():
 		float
 			Wartość energii dla danego stanu.
 		"""
-		weight_energy = np.dot(np.dot(self.weights, state).T, state)
+		return self._field_energy(self.storage.matvec(state), state)
+
+	def _field_energy(self, fields, state):
+		"""Oblicza energię stanu z jego nieskalowanych pól lokalnych W @ state."""
+		weight_energy = np.dot(fields, state)
 		biases_energy = np.dot(self.biases, state)
 
-		return -0.5 * weight_energy - biases_energy
+		return -0.5 * self.weight_scale * weight_energy - biases_energy
 	
-	def recall(self, input_pattern, synchronous=True, max_iterations=10, energy_tol=1e-9):
+	def recall(self, input_pattern, synchronous=True, max_iterations=10, energy_tol=1e-9, history='full', keyframe_interval=None, block_size=1, state_stopping=True, stop_patterns=None, return_info=False, rng=None, observer=None):
 		"""
 		Odtwarza wzorzec na podstawie wejściowego wzorca.
 
+		Zbiera historię z kroków zwracanych przez recall_steps.
+
 		Parameters
 		----------
 		input_pattern : ndarray
@@ -93,39 +452,463 @@ class Hopfield():
 			Maksymalna liczba iteracji.
 		energy_tol : float, default 0
 			Tolerancja zmiany energii do zatrzymania algorytmu.
+		history : {'full', 'compact'}, default 'full'
+			'full' - lista kopii stanu po każdym kroku.
+			'compact' - obiekt RecallHistory zapisujący tylko zmienione
+			neurony i odtwarzający stany na żądanie.
+		keyframe_interval : int, optional
+			Odstęp klatek kluczowych historii zwartej. Domyślnie rozmiar sieci.
+		block_size : int, default 1
+			Liczba neuronów aktualizowanych jednocześnie w trybie
+			asynchronicznym. 1 - klasyczna aktualizacja pojedynczych neuronów,
+			k > 1 - losowe bloki k neuronów (jeden krok historii na blok),
+			k >= N - jeden blok, czyli aktualizacja synchroniczna.
+		state_stopping : bool, default True
+			Zatrzymanie po iteracji bez zmiany żadnego neuronu (punkt stały)
+			oraz, w trybie synchronicznym, po wykryciu cyklu o okresie 2.
+		stop_patterns : iterable of ndarray, optional
+			Wzorce, po osiągnięciu których odtwarzanie jest przerywane.
+		return_info : bool, default False
+			Czy zwrócić dodatkowo słownik z przyczyną zatrzymania.
+		rng : numpy.random.Generator, optional
+			Generator losowej kolejności neuronów. Domyślnie globalny
+			generator numpy.random.
+		observer : Metrics.Observer, optional
+			Obserwator dostający po każdej iteracji czasy obliczeń (także
+			z podziałem na fazy RECALL_PHASES) i zapisu historii, liczbę
+			zmian, zmianę energii i przyrost historii w bajtach, a na końcu
+			podsumowanie.
 
 		Returns
 		-------
 		tuple
 			(states_history, energy_history) - historia stanów i energii.
+			Dla return_info=True dodatkowo słownik info z kluczami
+			'stop_reason' ('pattern', 'fixed_point', 'cycle', 'energy' lub
+			'max_iterations') i 'iterations' (liczba wykonanych iteracji).
+		"""
+		if history not in ('full', 'compact'):
+			raise ValueError(f"Nieznany tryb historii: {history}")
+		compact = history == 'compact'
+
+		timings = dict.fromkeys(RECALL_PHASES, 0.0) if observer is not None else None
+		steps = self.recall_steps(input_pattern, synchronous, max_iterations, energy_tol, block_size, state_stopping, stop_patterns, rng, timings)
+		steps_per_iteration = 1 if synchronous else -(-self.size // block_size)
+		return collect_steps(steps, compact, keyframe_interval or self.size, return_info, observer, steps_per_iteration, timings)
+
+	def recall_steps(self, input_pattern, synchronous=True, max_iterations=10, energy_tol=1e-9, block_size=1, state_stopping=True, stop_patterns=None, rng=None, timings=None):
 		"""
+		Generator kolejnych kroków odtwarzania.
+
+		Nic nie jest zapamiętywane - przerwanie iteracji kończy odtwarzanie,
+		a zwracany stan jest widokiem tylko do odczytu na bieżący stan sieci,
+		który trzeba skopiować, aby go zachować. Krok 0 to stan wejściowy.
+		Parametry jak w recall. Do słownika timings (klucze RECALL_PHASES)
+		dodawane są czasy faz obliczeń w sekundach; bez niego nic nie jest
+		mierzone.
+
+		Yields
+		------
+		tuple
+			(step, state, energy, flips) - numer kroku, widok stanu, energia
+			i tablica indeksów neuronów zmienionych w tym kroku.
+
+		Returns
+		-------
+		dict
+			Słownik info jak w recall (wartość StopIteration).
+		"""
+		if block_size < 1:
+			raise ValueError("Rozmiar bloku musi być dodatni")
+		stop_keys = {self._state_key(pattern) for pattern in stop_patterns} if stop_patterns is not None else set()
+		permutation = np.random.permutation if rng is None else rng.permutation
+		timed = timings is not None
+
 		state = input_pattern.flatten()
-		states_history = [state.copy()]
-		energy_history = [self.energy(state)]
+		if timed:
+			clock = time.perf_counter()
+		if synchronous:
+			# Pole lokalne stanu służy do jego energii i do następnej
+			# aktualizacji, więc każda iteracja to jedno mnożenie przez W
+			activation = self.storage.matvec(state)
+			if timed:
+				clock = lap_time(timings, 'field_time', clock)
+			energy = self._field_energy(activation, state)
+			buffers = (np.empty(self.size, dtype=int), np.empty(self.size, dtype=int))
+			positive = np.empty(self.size, dtype=bool)
+		else:
+			energy = self.energy(state)
+		if timed:
+			lap_time(timings, 'energy_time', clock)
+		step = 0
+		yield step, read_only_view(state), energy, np.empty(0, dtype=np.intp)
+
+		stop_reason = None
+		iterations = 0
+		two_back = None
+		previous_flips = None
 
 		for iteration in range(max_iterations):
+			cycle = False
+			start_energy = energy
+
 			if synchronous:
-				activation = np.dot(self.weights, state)
-				state = np.where(activation >= 0, 1, -1)
+				# Skala wag jest dodatnia, więc próg 0 nie zależy od niej.
+				# Nowy stan zapisywany jest na przemian w dwóch buforach.
+				previous_state, state = state, buffers[iteration % 2]
+				np.greater_equal(activation, -FIELD_TIE_TOL, out=positive)
+				np.multiply(positive, 2, out=state)
+				state -= 1
+				flipped = np.flatnonzero(state != previous_state)
+				flip_count = flipped.size
+
+				if timed:
+					clock = time.perf_counter()
+				activation = self.storage.matvec(state)
+				if timed:
+					clock = lap_time(timings, 'field_time', clock)
+				energy = self._field_energy(activation, state)
+				if timed:
+					lap_time(timings, 'energy_time', clock)
+				step += 1
+				yield step, read_only_view(state), energy, flipped
+
+				# Stan wraca do stanu sprzed dwóch iteracji (cykl 2), gdy
+				# zmieniają się te same neurony co w poprzedniej iteracji
+				if state_stopping and flip_count:
+					cycle = previous_flips is not None and np.array_equal(flipped, previous_flips)
+					previous_flips = flipped
+			elif block_size > 1:
+				# Bloki k neuronów: pola bloku odczytywane są z pól lokalnych,
+				# a zmiana bloku to jeden iloczyn W[:, blok] @ delta. Zmiana
+				# energii wymaga dodatkowo W[blok][:, blok] @ delta, czyli
+				# zmiany pól samego bloku.
+				if timed:
+					clock = time.perf_counter()
+				fields = self.storage.local_fields(state)
+				if timed:
+					clock = lap_time(timings, 'field_time', clock)
+				scale = self.weight_scale
+				view = read_only_view(state)
+				flip_count = 0
 
-				states_history.append(state.copy())
-				energy_history.append(self.energy(state))
+				idx = permutation(self.size)
+				if timed:
+					lap_time(timings, 'permutation_time', clock)
+				blocks = range(0, self.size, block_size)
+				previous_state = state.copy() if len(blocks) == 1 else None
+				for start in blocks:
+					block = idx[start:start + block_size]
+					if timed:
+						clock = time.perf_counter()
+					activation = fields.block(block)
+					if timed:
+						lap_time(timings, 'field_time', clock)
+					new_values = np.where(activation >= -FIELD_TIE_TOL, 1, -1)
+					changed = new_values != state[block]
 
-				if abs(energy_history[-1] - energy_history[-2]) < energy_tol:
-					break
+					if changed.any():
+						block, activation = block[changed], activation[changed]
+						deltas = new_values[changed] - state[block]
+						if timed:
+							clock = time.perf_counter()
+						block_change = fields.flip_block(block, deltas)
+						if timed:
+							lap_time(timings, 'field_time', clock)
+						state[block] = new_values[changed]
+						energy -= scale * (np.dot(deltas, activation) + 0.5 * np.dot(deltas, block_change)) + np.dot(self.biases[block], deltas)
+						flip_count += block.size
+					else:
+						block = block[:0]
+
+					# Dokładna energia na końcu cyklu, aby błędy zaokrągleń nie
+					# kumulowały się między iteracjami
+					if start == blocks[-1]:
+						if timed:
+							clock = time.perf_counter()
+						energy = self.energy(state)
+						if timed:
+							lap_time(timings, 'energy_time', clock)
+					step += 1
+					yield step, view, energy, block
+
+				# Cykl jest pewny tylko przy jednym bloku (dynamika synchroniczna)
+				if state_stopping and flip_count and previous_state is not None:
+					cycle = two_back is not None and np.array_equal(state, two_back)
+					two_back = previous_state
 			else:
-				idx = np.random.permutation(self.size)
-				for i in idx:
-					activation = np.dot(self.weights[i], state)
-					state[i] = 1 if activation >= 0 else -1
+				# Pola lokalne i energia aktualizowane są przyrostowo po każdej
+				# zmianie neuronu, więc jedna aktualizacja kosztuje O(N)
+				# (O(P) dla magazynu w przestrzeni wzorców).
+				if timed:
+					clock = time.perf_counter()
+				fields = self.storage.local_fields(state)
+				if timed:
+					clock = lap_time(timings, 'field_time', clock)
+				scale = self.weight_scale
+				view = read_only_view(state)
+				flip_count = 0
+
+				idx = permutation(self.size)
+				if timed:
+					lap_time(timings, 'permutation_time', clock)
+				for position, i in enumerate(idx):
+					if timed:
+						clock = time.perf_counter()
+					activation = fields.field(i)
+					if timed:
+						lap_time(timings, 'field_time', clock)
+					new_value = 1 if activation >= -FIELD_TIE_TOL else -1
+					delta = new_value - state[i]
+
+					if delta != 0:
+						if timed:
+							clock = time.perf_counter()
+						fields.flip(i, delta)
+						if timed:
+							lap_time(timings, 'field_time', clock)
+						state[i] = new_value
+						energy -= delta * (scale * activation + self.biases[i]) + 0.5 * delta * delta * scale * self.storage.diagonal(i)
+						flip_count += 1
+
+					if position == self.size - 1:
+						if timed:
+							clock = time.perf_counter()
+						energy = self.energy(state)
+						if timed:
+							lap_time(timings, 'energy_time', clock)
+					step += 1
+					yield step, view, energy, idx[position:position + 1] if delta != 0 else idx[:0]
+
+			iterations = iteration + 1
+
+			if stop_keys and self._state_key(state) in stop_keys:
+				stop_reason = 'pattern'
+			elif state_stopping and flip_count == 0:
+				stop_reason = 'fixed_point'
+			elif cycle:
+				stop_reason = 'cycle'
+			elif abs(energy - start_energy) < energy_tol:
+				stop_reason = 'energy'
+
+			if stop_reason:
+				break
+
+		return {'stop_reason': stop_reason or 'max_iterations', 'iterations': iterations}
+
+	@staticmethod
+	def _state_key(state):
+		"""Zwraca klucz stanu 1/-1 do porównań w zbiorze (spakowane bity)."""
+		return np.packbits(np.ravel(state) > 0).tobytes()
+
+	def recall_batch(self, states, max_iterations=10, energy_tol=1e-9):
+		"""
+		Odtwarza synchronicznie wiele wzorców jednocześnie.
+
+		Każda iteracja to jedno mnożenie macierz-macierz dla wszystkich
+		aktywnych próbek - pola lokalne nowych stanów służą do ich energii
+		i do następnej aktualizacji, jak w recall_steps. Próbki, które
+		osiągnęły zbieżność, są maskowane i nie biorą udziału w dalszych
+		obliczeniach.
+
+		Parameters
+		----------
+		states : ndarray
+			Wzorce wejściowe o kształcie (B, N) lub (B, wys, szer).
+		max_iterations : int, default 10
+			Maksymalna liczba iteracji.
+		energy_tol : float, default 1e-9
+			Tolerancja zmiany energii do zatrzymania danej próbki.
+
+		Returns
+		-------
+		tuple
+			(states, iterations, energies) - stany końcowe (B, N), liczba
+			wykonanych iteracji (B,) i energie stanów końcowych (B,).
+		"""
+		states = np.asarray(states)
+		states = states.reshape(states.shape[0], -1).copy()
+		batch_size = states.shape[0]
+
+		iterations = np.zeros(batch_size, dtype=int)
+		activation = self.storage.matmat(states)
+		energies = self._batch_field_energy(activation, states)
+		active = np.arange(batch_size)
+
+		for iteration in range(max_iterations):
+			if active.size == 0:
+				break
+
+			# Wiersze activation odpowiadają aktywnym próbkom
+			new_states = np.where(activation >= -FIELD_TIE_TOL, 1, -1)
+			activation = self.storage.matmat(new_states)
+			new_energies = self._batch_field_energy(activation, new_states)
+
+			states[active] = new_states
+			iterations[active] += 1
+			converged = np.abs(new_energies - energies[active]) < energy_tol
+			energies[active] = new_energies
+
+			active = active[~converged]
+			activation = activation[~converged]
+
+		return states, iterations, energies
+
+	def _batch_energy(self, states):
+		"""Oblicza energię dla każdego wiersza macierzy stanów (B, N)."""
+		return self._batch_field_energy(self.storage.matmat(states), states)
+
+	def _batch_field_energy(self, fields, states):
+		"""Oblicza energie wierszy stanów (B, N) z ich nieskalowanych pól lokalnych."""
+		weight_energy = np.einsum('ij,ij->i', fields, states)
+		biases_energy = np.dot(states, self.biases)
+
+		return -0.5 * self.weight_scale * weight_energy - biases_energy
+
+def collect_steps(steps, compact, keyframe_interval, return_info, observer=None, steps_per_iteration=1, timings=None):
+	"""
+	Zbiera kroki generatora recall_steps w historię stanów i energii.
+
+	Parameters
+	----------
+	steps : generator
+		Generator krotek (step, state, energy, flips).
+	compact : bool
+		Czy zapisywać historię jako RecallHistory.
+	keyframe_interval : int
+		Odstęp klatek kluczowych historii zwartej.
+	return_info : bool
+		Czy zwrócić dodatkowo słownik info.
+	observer : Metrics.Observer, optional
+		Obserwator mierzonych iteracji.
+	steps_per_iteration : int, default 1
+		Liczba kroków generatora w jednej iteracji.
+	timings : dict, optional
+		Słownik czasów faz, do którego dodaje je generator (jak w
+		recall_steps). Czasy są raportowane w rekordach iteracji.
+
+	Returns
+	-------
+	tuple
+		(states_history, energy_history) lub (states_history, energy_history, info).
+	"""
+	if observer is not None:
+		return _collect_observed_steps(steps, compact, keyframe_interval, return_info, observer, steps_per_iteration, timings or {})
+
+	step, state, energy, flips = next(steps)
+	if compact:
+		states_history = RecallHistory(state, keyframe_interval)
+	else:
+		states_history = [state.copy()]
+	energy_history = [energy]
+
+	while True:
+		try:
+			step, state, energy, flips = next(steps)
+		except StopIteration as stop:
+			info = stop.value
+			break
+
+		if compact:
+			states_history.append(flips)
+		else:
+			states_history.append(state.copy())
+		energy_history.append(energy)
+
+	if return_info:
+		return states_history, energy_history, info
+	return states_history, energy_history
+
+def _collect_observed_steps(steps, compact, keyframe_interval, return_info, observer, steps_per_iteration, timings):
+	"""Jak collect_steps, ale mierzy każdy krok i raportuje iteracje obserwatorowi."""
+	started = time.perf_counter()
+	step, state, energy, flips = next(steps)
+	if compact:
+		states_history = RecallHistory(state, keyframe_interval)
+	else:
+		states_history = [state.copy()]
+	energy_history = [energy]
+	setup_time = time.perf_counter() - started
+
+	# Fazy kroku 0 należą do setup_time
+	phases = tuple(timings)
+	timings.update(dict.fromkeys(phases, 0.0))
+
+	history_bytes = _history_bytes(states_history)
+	fields = ('steps', 'step_time', 'history_time', 'history_bytes', 'flips') + phases
+	totals = dict.fromkeys(fields, 0)
+	iteration = 0
+	record = None
+
+	while True:
+		step_start = time.perf_counter()
+		try:
+			step, state, energy, flips = next(steps)
+		except StopIteration as stop:
+			info = stop.value
+			break
+		history_start = time.perf_counter()
+
+		if compact:
+			states_history.append(flips)
+		else:
+			states_history.append(state.copy())
+		energy_history.append(energy)
+		history_end = time.perf_counter()
+
+		if record is None:
+			iteration += 1
+			record = dict({'iteration': iteration}, **dict.fromkeys(fields, 0))
+			start_energy = energy_history[-2]
+		record['steps'] += 1
+		record['step_time'] += history_start - step_start
+		record['history_time'] += history_end - history_start
+		record['flips'] += len(flips)
+
+		if record['steps'] == steps_per_iteration:
+			new_bytes = _history_bytes(states_history)
+			record['history_bytes'], history_bytes = new_bytes - history_bytes, new_bytes
+			record['energy'] = energy
+			record['energy_delta'] = energy - start_energy
+			for phase in phases:
+				record[phase], timings[phase] = timings[phase], 0.0
+			observer.recall_iteration(record)
+
+			for field in fields:
+				totals[field] += record[field]
+			record = None
+
+	totals.update({
+		'iterations': info['iterations'],
+		'stop_reason': info['stop_reason'],
+		'setup_time': setup_time,
+		'total_time': time.perf_counter() - started,
+		'initial_energy': energy_history[0],
+		'final_energy': energy_history[-1],
+	})
+	observer.recall_finished(totals)
+
+	if return_info:
+		return states_history, energy_history, info
+	return states_history, energy_history
 
-					states_history.append(state.copy())
-					energy_history.append(self.energy(state))
+def lap_time(timings, phase, start):
+	"""Dodaje czas od start do fazy w timings i zwraca bieżący czas."""
+	now = time.perf_counter()
+	timings[phase] += now - start
+	return now
 
-				if abs(energy_history[-1] - energy_history[-1-self.size]) < energy_tol:
-					break
+def _history_bytes(states_history):
+	"""Zwraca rozmiar historii stanów w bajtach."""
+	if isinstance(states_history, RecallHistory):
+		return states_history.nbytes
+	return len(states_history) * states_history[0].nbytes
 
-		return states_history, energy_history
+def read_only_view(state):
+	"""Zwraca widok stanu tylko do odczytu."""
+	view = state.view()
+	view.flags.writeable = False
+	return view
 
 if __name__ == "__main__":
 	import app
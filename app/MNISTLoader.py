@@ -1,7 +1,12 @@
+import os
+
 import numpy as np
-from datasets import load_dataset
 from PIL import Image
-from PyQt6.QtWidgets import QMessageBox
+
+from PatternSet import PatternSet
+
+# Rozszerzenia plików czytanych przez iter_folder_patterns
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
 
 def binarize_image(image):
 	"""Binaryzuje obraz do wartości {-1, 1}"""
@@ -13,28 +18,54 @@ def resize_image(image, target_size):
 	#	image = Image.fromarray(image.astype(np.uint8))
 	return image.resize(target_size, Image.Resampling.NEAREST)
 
-def load_fashion_mnist_patterns(parent, num_patterns=5, target_size=(28, 28)):
-	"""Ładuje wzorce z MNIST Fashion używając datasets"""
-	try:
-		# Załaduj dataset
-		dataset = load_dataset("fashion_mnist", split="test")
-		
-		images = dataset[:num_patterns]['image']
-		patterns = []
-		
-		# Iteruj przez dataset i zbierz wzorce
-		for img in images:
-			resized = resize_image(img, target_size)
-			binary_pattern = binarize_image(resized)
-
-			patterns.append(binary_pattern)
-
-		return patterns
-		
-	except Exception as e:
-		if parent:
-			QMessageBox.critical(parent, "Błąd", f"Błąd podczas ładowania MNIST Fashion: {str(e)}")
-		return None
+def load_fashion_mnist_patterns(num_patterns=5, target_size=(28, 28)):
+	"""
+	Ładuje wzorce z MNIST Fashion używając datasets.
+
+	Pakiet datasets importowany jest dopiero tutaj, bo jego import jest
+	wolny. Błędy pobierania zgłaszane są wyjątkami.
+	"""
+	from datasets import load_dataset
+
+	# Załaduj dataset
+	dataset = load_dataset("fashion_mnist", split="test")
+	
+	images = dataset[:num_patterns]['image']
+	patterns = PatternSet((target_size[1], target_size[0]), capacity=len(images))
+	
+	# Iteruj przez dataset i zbierz wzorce
+	for img in images:
+		resized = resize_image(img, target_size)
+		binary_pattern = binarize_image(resized)
+
+		patterns.append(binary_pattern)
+
+	return patterns
+
+def iter_fashion_mnist_patterns(split="train", target_size=(28, 28), limit=None):
+	"""
+	Generator wzorców z MNIST Fashion wczytywanych strumieniowo.
+
+	Obrazy pobierane są i binaryzowane pojedynczo, więc całego zbioru nie
+	trzeba trzymać w pamięci. Wynik można przekazać do Hopfield.train.
+	"""
+	from datasets import load_dataset
+
+	dataset = load_dataset("fashion_mnist", split=split, streaming=True)
+
+	for index, example in enumerate(dataset):
+		if limit is not None and index >= limit:
+			break
+		yield binarize_image(resize_image(example['image'], target_size))
+
+def iter_folder_patterns(folder, target_size=(28, 28)):
+	"""Generator wzorców z plików obrazów w folderze (w kolejności nazw)"""
+	for name in sorted(os.listdir(folder)):
+		if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+			continue
+
+		with Image.open(os.path.join(folder, name)) as image:
+			yield binarize_image(resize_image(image, target_size))
 
 if __name__ == "__main__":
 	import app
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import (QVBoxLayout, QHBoxLayout, QPushButton, QLabel)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
-import ModelIO
+import Dialogs
 from BaseView import BaseView
 
 class MainMenuView(BaseView):
@@ -61,7 +61,7 @@ class MainMenuView(BaseView):
 	
 	def import_model(self):
 		"""Importuje model z pliku i przechodzi do testowania"""
-		model_data = ModelIO.import_model(self)
+		model_data = Dialogs.import_model(self)
 		if model_data:
 			self.main_window.switch_to_view("ModelTest", model_data)
 
@@ -0,0 +1,142 @@
+import csv
+import json
+
+class Observer():
+	"""
+	Obserwator odtwarzania i uczenia sieci.
+
+	Obiekt przekazany jako observer do Hopfield.recall, Hopfield.train lub
+	Hopfield.add_patterns dostaje rekordy z pomiarami kolejnych iteracji
+	(porcji wzorców) i podsumowanie całego przebiegu. Metody tej klasy nic
+	nie robią - wystarczy nadpisać potrzebne.
+	"""
+
+	def recall_iteration(self, record):
+		"""
+		Wywoływana po każdej iteracji odtwarzania.
+
+		Parameters
+		----------
+		record : dict
+			'iteration' - numer iteracji (od 1),
+			'steps' - liczba kroków historii w iteracji,
+			'step_time' - czas obliczeń w sekundach (mnożenia przez wagi,
+			energia, losowanie kolejności),
+			'permutation_time', 'field_time', 'energy_time' - części
+			step_time: losowanie kolejności neuronów, pola lokalne
+			(mnożenia przez wagi i aktualizacje pól) i energia; reszta
+			step_time to progowanie i obsługa generatora,
+			'history_time' - czas zapisu historii w sekundach,
+			'history_bytes' - bajty dopisane do historii,
+			'flips' - liczba zmienionych neuronów,
+			'energy' - energia po iteracji,
+			'energy_delta' - zmiana energii w iteracji.
+		"""
+
+	def recall_finished(self, totals):
+		"""
+		Wywoływana po zakończeniu odtwarzania.
+
+		Parameters
+		----------
+		totals : dict
+			Sumy pól rekordów iteracji ('steps', 'step_time', czasy faz,
+			'history_time', 'history_bytes', 'flips') oraz 'iterations', 'stop_reason',
+			'setup_time' (obliczenia dla stanu wejściowego), 'total_time',
+			'initial_energy' i 'final_energy'.
+		"""
+
+	def train_chunk(self, record):
+		"""
+		Wywoływana po każdej porcji wzorców podczas uczenia.
+
+		Parameters
+		----------
+		record : dict
+			'chunk' - numer porcji (od 1), 'patterns' - liczba wzorców
+			w porcji, 'time' - czas dodania porcji w sekundach,
+			'pattern_count' - liczba wzorców sieci po porcji.
+		"""
+
+	def train_finished(self, totals):
+		"""
+		Wywoływana po zakończeniu uczenia.
+
+		Parameters
+		----------
+		totals : dict
+			'chunks', 'patterns', 'time' (suma czasów porcji),
+			'total_time' (razem ze skalowaniem wag) i 'pattern_count'.
+		"""
+
+class MetricsCollector(Observer):
+	"""
+	Obserwator zapisujący pomiary kolejnych przebiegów.
+
+	Jeden obiekt można przekazywać do wielu wywołań - każde odtwarzanie
+	i uczenie to osobny przebieg z numerem. Wyniki można zapisać do JSON
+	(pełna struktura) lub CSV (jeden wiersz na iterację lub porcję).
+
+	Attributes
+	----------
+	runs : list of dict
+		Przebiegi z kluczami 'run', 'kind' ('recall' lub 'train'),
+		'records' i 'totals'.
+	"""
+
+	def __init__(self):
+		self.runs = []
+		self._records = []
+
+	def recall_iteration(self, record):
+		self._records.append(record)
+
+	def recall_finished(self, totals):
+		self._finish('recall', totals)
+
+	def train_chunk(self, record):
+		self._records.append(record)
+
+	def train_finished(self, totals):
+		self._finish('train', totals)
+
+	def _finish(self, kind, totals):
+		"""Zamyka bieżący przebieg."""
+		self.runs.append({'run': len(self.runs), 'kind': kind, 'records': self._records, 'totals': totals})
+		self._records = []
+
+	def clear(self):
+		"""Usuwa zebrane przebiegi."""
+		self.runs = []
+		self._records = []
+
+	def totals(self, kind='recall'):
+		"""Zwraca listę podsumowań przebiegów danego rodzaju."""
+		return [run['totals'] for run in self.runs if run['kind'] == kind]
+
+	def to_json(self, path):
+		"""Zapisuje wszystkie przebiegi do pliku JSON."""
+		with open(path, 'w') as f:
+			json.dump(self.runs, f, indent=2)
+
+	def to_csv(self, path, kind='recall'):
+		"""
+		Zapisuje rekordy przebiegów danego rodzaju do pliku CSV.
+
+		Każdy wiersz to jedna iteracja odtwarzania (kind='recall') lub
+		porcja uczenia (kind='train'), poprzedzona numerem przebiegu.
+		"""
+		rows = [dict(record, run=run['run']) for run in self.runs if run['kind'] == kind for record in run['records']]
+
+		columns = ['run']
+		for row in rows:
+			columns.extend(key for key in row if key not in columns)
+
+		with open(path, 'w', newline='') as f:
+			writer = csv.DictWriter(f, fieldnames=columns)
+			writer.writeheader()
+			writer.writerows(rows)
+
+if __name__ == "__main__":
+	import app
+	app.main()
@@ -0,0 +1,264 @@
+import json
+import os
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+
+#	Binarny, wersjonowany format pliku modelu (.hop).
+#
+#	Układ pliku:
+#	- prefiks PREFIX: MAGIC, wersja formatu (uint16), zarezerwowane (uint16)
+#	  i długość nagłówka (uint32), little-endian,
+#	- nagłówek JSON z kształtem wzorców, regułą uczenia, magazynem i skalą wag
+#	  oraz opisem sekcji (przesunięcie, długość, typ, kształt),
+#	- sekcje danych wyrównane do ALIGNMENT bajtów, liczone od końca nagłówka:
+#	  'patterns' (wzorce spakowane bitowo, jak w PatternSet), 'biases' (float64)
+#	  i opcjonalnie 'weights' (dane magazynu wag w wybranym typie).
+#
+#	Bez kompresji sekcja wag wczytywana jest bez kopiowania przez np.memmap.
+#	W przeciwieństwie do pickle plik nie może wykonać kodu przy wczytaniu.
+
+MAGIC = b'HOPFIELD'
+
+FORMAT_VERSION = 1
+
+PREFIX = struct.Struct('<8sHHI')
+
+# Wyrównanie sekcji danych (pozwala mapować wagi dowolnego typu)
+ALIGNMENT = 64
+
+MODEL_EXTENSION = '.hop'
+
+COMPRESSIONS = (None, 'zlib')
+
+# Rozmiar fragmentu danych przekazywanego naraz do kompresji
+COMPRESS_CHUNK = 1 << 24
+
+def is_model_file(file_path):
+	"""Sprawdza, czy plik zaczyna się od sygnatury formatu"""
+	with open(file_path, 'rb') as f:
+		return f.read(len(MAGIC)) == MAGIC
+
+def save(file_path, model_data, weight_dtype=None, include_weights=True, compression=None):
+	"""
+	Zapisuje słownik modelu (jak ModelIO.model_data) w formacie binarnym.
+
+	Parameters
+	----------
+	file_path : str
+		Ścieżka pliku.
+	model_data : dict
+		Wzorce, wagi, biasy, magazyn, skala wag i reguła uczenia.
+	weight_dtype : dtype, optional
+		Typ zapisywanych wag. Domyślnie typ magazynu. Wagi float64 są
+		przeskalowane, pozostałe typy zapisują liczniki Hebba ze skalą 1/P.
+	include_weights : bool, default True
+		False - wagi są pomijane i odtwarzane przy wczytaniu przez uczenie
+		na zapisanych wzorcach.
+	compression : {None, 'zlib'}, default None
+		Kompresja sekcji danych. Skompresowanych wag nie można mapować.
+
+	Plik zapisywany jest obok docelowego i podmieniany przez os.replace,
+	więc zapis do pliku, na który zmapowane są wagi modelu, nie uszkadza
+	ani pliku, ani mapowania.
+	"""
+	if compression not in COMPRESSIONS:
+		raise ValueError(f"Nieznana kompresja: {compression}")
+
+	patterns = np.asarray(model_data['patterns'])
+	pattern_count = len(patterns)
+	matrix = patterns.reshape(pattern_count, -1)
+
+	weights, weight_scale = model_data['weights'], model_data['weight_scale']
+	if weight_dtype is not None:
+		weights, weight_scale = convert_weights(model_data, np.dtype(weight_dtype))
+
+	arrays = {
+		'patterns': np.packbits(matrix > 0, axis=1),
+		'biases': np.asarray(model_data['biases'], dtype=np.float64),
+	}
+	if include_weights:
+		arrays['weights'] = np.ascontiguousarray(weights)
+
+	sections, blocks, position = {}, [], 0
+	for name, array in arrays.items():
+		block = _compress(array, compression)
+		position = _align(position)
+		sections[name] = {
+			'offset': position,
+			'length': len(block),
+			'dtype': array.dtype.str,
+			'shape': list(array.shape),
+		}
+		blocks.append((position, block))
+		position += len(block)
+
+	header = {
+		'shape': list(patterns.shape[1:]),
+		'size': matrix.shape[1],
+		'pattern_count': pattern_count,
+		'learning_rule': model_data.get('learning_rule', 'hebbian'),
+		'weight_storage': model_data.get('weight_storage', 'dense'),
+		'weight_scale': float(weight_scale),
+		'weight_dtype': np.dtype(weights.dtype).str,
+		'compression': compression,
+		'sections': sections,
+	}
+	header_bytes = json.dumps(header).encode('utf-8')
+	data_start = _align(PREFIX.size + len(header_bytes))
+
+	directory, name = os.path.split(os.path.abspath(file_path))
+	descriptor, temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+	try:
+		with os.fdopen(descriptor, 'wb') as f:
+			f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes)))
+			f.write(header_bytes)
+			for offset, block in blocks:
+				f.write(b'\0' * (data_start + offset - f.tell()))
+				f.write(block)
+		# mkstemp tworzy plik z prawami 0600, a zapisany model ma mieć domyślne
+		umask = os.umask(0)
+		os.umask(umask)
+		os.chmod(temp_path, 0o666 & ~umask)
+		os.replace(temp_path, file_path)
+	except BaseException:
+		os.remove(temp_path)
+		raise
+
+def read_header(file_path):
+	"""
+	Wczytuje nagłówek pliku modelu.
+
+	Returns
+	-------
+	tuple
+		(header, data_start) - słownik nagłówka i położenie początku sekcji.
+	"""
+	with open(file_path, 'rb') as f:
+		prefix = f.read(PREFIX.size)
+		if len(prefix) < PREFIX.size:
+			raise ValueError("Plik modelu jest uszkodzony")
+
+		magic, version, _, header_length = PREFIX.unpack(prefix)
+		if magic != MAGIC:
+			raise ValueError("Plik nie jest plikiem modelu sieci Hopfielda")
+		if version > FORMAT_VERSION:
+			raise ValueError(f"Nieobsługiwana wersja formatu modelu: {version}")
+
+		header = json.loads(f.read(header_length).decode('utf-8'))
+
+	return header, _align(PREFIX.size + header_length)
+
+def load_data(file_path, mmap=True):
+	"""
+	Wczytuje plik modelu do słownika w formacie ModelIO.model_data.
+
+	Parameters
+	----------
+	file_path : str
+		Ścieżka pliku.
+	mmap : bool, default True
+		True - nieskompresowane wagi mapowane są w pamięć (np.memmap w trybie
+		kopii przy zapisie: dane czytane są z pliku na żądanie, a zmiany
+		wag nie trafiają do pliku). False - wagi wczytywane są do RAM.
+
+	Returns
+	-------
+	dict
+		Wzorce int8 (P, wys, szer), wagi (None, gdy zostały pominięte),
+		biasy, magazyn, typ i skala wag oraz reguła uczenia.
+	"""
+	header, data_start = read_header(file_path)
+	compression = header['compression']
+	sections = header['sections']
+
+	def read(name, mapped=False):
+		section = sections[name]
+		dtype, shape = np.dtype(section['dtype']), tuple(section['shape'])
+		offset = data_start + section['offset']
+
+		if compression is None and mapped and section['length'] > 0:
+			return np.memmap(file_path, dtype=dtype, mode='c', offset=offset, shape=shape)
+
+		with open(file_path, 'rb') as f:
+			f.seek(offset)
+			block = f.read(section['length'])
+		if len(block) < section['length']:
+			raise ValueError("Plik modelu jest uszkodzony")
+		if compression == 'zlib':
+			block = zlib.decompress(block)
+
+		return np.frombuffer(block, dtype=dtype).reshape(shape).copy()
+
+	size = header['size']
+	bits = np.unpackbits(read('patterns'), axis=1, count=size).view(np.int8)
+	patterns = (bits * 2 - 1).reshape([header['pattern_count']] + header['shape'])
+
+	return {
+		'patterns': patterns,
+		'weights': read('weights', mmap) if 'weights' in sections else None,
+		'biases': read('biases'),
+		'weight_storage': header['weight_storage'],
+		'weight_dtype': np.dtype(header['weight_dtype']),
+		'weight_scale': header['weight_scale'],
+		'learning_rule': header['learning_rule'],
+	}
+
+def convert_weights(model_data, dtype):
+	"""
+	Zamienia wagi modelu na podany typ.
+
+	Rzeczywiste wagi to weight_scale * weights. Dla float64 zapisywane są
+	wagi przeskalowane (skala 1), dla pozostałych typów liczniki Hebba
+	(wagi razy liczba wzorców) ze skalą 1/P, jak w Hopfield.
+
+	Returns
+	-------
+	tuple
+		(weights, weight_scale)
+	"""
+	weights = np.asarray(model_data['weights'])
+	if weights.dtype == dtype:
+		return weights, model_data['weight_scale']
+
+	if model_data.get('weight_storage', 'dense') == 'lowrank':
+		raise ValueError("Magazyn w przestrzeni wzorców przechowuje wzorce int8 - typ wag nie może być zmieniony")
+
+	weights = weights * model_data['weight_scale']
+	if dtype == np.float64:
+		return weights, 1.0
+
+	if model_data.get('learning_rule', 'hebbian') != 'hebbian':
+		raise ValueError("Liczniki wag można zapisać tylko dla reguły Hebba")
+
+	# Wagi spoza reguły Hebba z bieżącą skalą (np. starsze modele) nie są
+	# całkowitymi licznikami i nie dają się zapisać bez straty
+	pattern_count = len(model_data['patterns'])
+	counts = np.rint(weights * pattern_count)
+	if not np.allclose(counts, weights * pattern_count, rtol=0, atol=1e-6):
+		raise ValueError("Wagi nie są licznikami Hebba zapamiętanych wzorców - zapisz je jako float64")
+	if dtype.kind in 'iu' and (counts.min(initial=0) < np.iinfo(dtype).min or counts.max(initial=0) > np.iinfo(dtype).max):
+		raise ValueError(f"Liczniki wag nie mieszczą się w typie {dtype}")
+
+	return counts.astype(dtype), 1.0 / pattern_count
+
+def _compress(array, compression):
+	"""Zwraca bajty tablicy, skompresowane fragmentami dla compression='zlib'."""
+	view = memoryview(np.ascontiguousarray(array)).cast('B')
+	if compression is None:
+		return view
+
+	compressor = zlib.compressobj()
+	chunks = [compressor.compress(view[start:start + COMPRESS_CHUNK]) for start in range(0, len(view), COMPRESS_CHUNK)]
+	chunks.append(compressor.flush())
+	return b''.join(chunks)
+
+def _align(position):
+	"""Zaokrągla położenie w górę do wielokrotności ALIGNMENT."""
+	return -(-position // ALIGNMENT) * ALIGNMENT
+
+if __name__ == "__main__":
+	import app
+	app.main()
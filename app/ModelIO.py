@@ -1,78 +1,111 @@
+import os
 import pickle
-from os.path import splitext
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
 
-def export_model(parent, patterns, model):
-	"""Eksportuje model z wzorcami, wagami i biasami do pliku"""
+import numpy as np
+
+import ModelFile
+from Hopfield import Hopfield
+from PatternSet import PatternSet
+from WeightStorage import STORAGES
+
+#	Zapis i odczyt modeli bez zależności od interfejsu graficznego. Błędy
+#	zgłaszane są wyjątkami - okna dialogowe dodaje moduł Dialogs.
+#	Modele zapisywane są w formacie binarnym ModelFile (.hop), pliki pickle
+#	(.pkl) z wcześniejszych wersji są nadal obsługiwane.
+
+# Klucze wymagane w pliku modelu
+REQUIRED_KEYS = ('patterns', 'weights', 'biases')
+
+def model_data(patterns, model):
+	"""Zwraca słownik z wzorcami (PatternSet), wagami i biasami modelu do zapisu"""
 	if not patterns or not model:
-		QMessageBox.warning(parent, "Błąd", "Brak wzorców lub modelu do eksportu")
-		return False
-	
-	try:
-		# Wybierz plik do zapisu
-		file_path, _ = QFileDialog.getSaveFileName(
-			parent,
-			"Zapisz model",
-			"",
-			"Pickle files (*.pkl);;All files (*.*)"
-		)
-		
-		if not file_path:
-			return False
-		
-		# Dodaj rozszerzenie .pkl jeśli nie ma żadnego rozszerzenia
-		if not splitext(file_path)[1]:
-			file_path += '.pkl'
-		
-		# Przygotuj dane do zapisu
-		model_data = {
-			'patterns': patterns,
-			'weights': model.weights,
-			'biases': model.biases
-		}
-		
-		# Zapisz do pliku
+		raise ValueError("Brak wzorców lub modelu do eksportu")
+
+	# Wagi mapowane w pamięć to zwykła pełna macierz. Struktury połączeń
+	# magazynu rzadkiego format pliku nie przechowuje
+	kind = model.storage.kind
+	if kind == 'memmap':
+		kind = 'dense'
+	elif kind not in STORAGES:
+		raise ValueError(f"Nie można zapisać modelu z magazynem wag '{kind}'")
+
+	# Wzorce jako jedna tablica int8 (P, wys, szer)
+	return {
+		'patterns': patterns.to_array(),
+		'weights': model.weights,
+		'weight_storage': kind,
+		'weight_scale': model.weight_scale,
+		'learning_rule': model.learning_rule,
+		'biases': model.biases
+	}
+
+def save_model(file_path, patterns, model, **options):
+	"""
+	Zapisuje model z wzorcami do pliku.
+
+	Pliki z rozszerzeniem .pkl zapisywane są jako pickle, pozostałe
+	w formacie ModelFile. Opcje (weight_dtype, include_weights,
+	compression) przekazywane są do ModelFile.save.
+	"""
+	# Windows nie pozwala nadpisać pliku, na który zmapowane są wagi, więc
+	# model przechodzi na kopię wag w pamięci
+	if os.name == 'nt' and isinstance(model.storage.data, np.memmap):
+		model.storage.data = np.array(model.storage.data)
+
+	data = model_data(patterns, model)
+	if file_path.endswith('.pkl'):
 		with open(file_path, 'wb') as f:
-			pickle.dump(model_data, f)
-		
-		QMessageBox.information(parent, "Sukces", "Model został zapisany pomyślnie")
-		return True
-			
-	except Exception as e:
-		QMessageBox.critical(parent, "Błąd", f"Nie udało się zapisać modelu:\n{str(e)}")
-		return False
-
-def import_model(parent):
-	"""Importuje model z pliku"""
-	try:
-		# Wybierz plik do wczytania
-		file_path, _ = QFileDialog.getOpenFileName(
-			parent,
-			"Wybierz plik modelu",
-			"",
-			"Pickle files (*.pkl);;All files (*.*)"
+			pickle.dump(data, f)
+		return
+
+	ModelFile.save(file_path, data, **options)
+
+def load_model_data(file_path, mmap=True):
+	"""
+	Wczytuje słownik modelu z pliku i sprawdza jego strukturę.
+
+	Format rozpoznawany jest po sygnaturze pliku. Pliki pickle mogą
+	wykonać dowolny kod - należy wczytywać tylko zaufane pliki .pkl.
+	"""
+	if ModelFile.is_model_file(file_path):
+		return ModelFile.load_data(file_path, mmap)
+
+	with open(file_path, 'rb') as f:
+		data = pickle.load(f)
+
+	if not isinstance(data, dict) or not all(key in data for key in REQUIRED_KEYS):
+		raise ValueError("Niepoprawna struktura pliku modelu")
+	return data
+
+def model_from_data(data):
+	"""Tworzy (PatternSet, Hopfield) ze słownika modelu"""
+	if len(data['patterns']) <= 0:
+		raise ValueError("Plik modelu nie zawiera wzorców")
+
+	patterns = PatternSet.from_patterns(data['patterns'])
+
+	# Plik bez wag - sieć uczona jest od nowa na zapisanych wzorcach
+	if data['weights'] is None:
+		model = Hopfield(
+			len(data['biases']), weight_dtype=data.get('weight_dtype'),
+			storage=data.get('weight_storage', 'dense'),
+			learning_rule=data.get('learning_rule', 'hebbian')
 		)
-		
-		if not file_path:
-			return None
-		
-		# Wczytaj dane z pliku
-		with open(file_path, 'rb') as f:
-			model_data = pickle.load(f)
-		
-		# Walidacja struktury danych
-		required_keys = ['patterns', 'weights', 'biases']
-		if not all(key in model_data for key in required_keys):
-			QMessageBox.critical(parent, "Błąd", "Niepoprawna struktura pliku modelu")
-			return None
-		
-		QMessageBox.information(parent, "Sukces", "Model został wczytany pomyślnie")
-		return model_data
-		
-	except Exception as e:
-		QMessageBox.critical(parent, "Błąd", f"Nie udało się wczytać modelu:\n{str(e)}")
-		return None
+		model.train(patterns)
+		return patterns, model
+
+	model = Hopfield(
+		len(data['biases']), data['weights'], data['biases'], len(patterns),
+		weight_scale=data.get('weight_scale', 1.0),
+		storage=data.get('weight_storage', 'dense'),
+		learning_rule=data.get('learning_rule', 'hebbian')
+	)
+	return patterns, model
+
+def load_model(file_path, mmap=True):
+	"""Wczytuje model z pliku i zwraca (PatternSet, Hopfield)"""
+	return model_from_data(load_model_data(file_path, mmap))
 
 if __name__ == "__main__":
 	import app
-	app.main()
\ No newline at end of file
+	app.main()
@@ -3,15 +3,34 @@ from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 from PyQt6.QtWidgets import (QCheckBox, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
-														 QFrame, QSpinBox, QMessageBox, QTabWidget, QWidget, QSlider,
+														 QFrame, QSpinBox, QDoubleSpinBox, QMessageBox, QTabWidget, QWidget, QSlider,
 														 QTableWidget, QTableWidgetItem, QHeaderView)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
+import Dialogs
 import ModelIO
+import Probes
 from BaseView import BaseView
 from PixelGridCanvas import PixelGridCanvas
 from Hopfield import Hopfield
+from ModernHopfield import ModernHopfield
+from PatternSet import PatternSet
+
+# Od tej liczby neuronów nowe modele przechowują wagi jako spakowane liczniki int16
+LARGE_MODEL_SIZE = 64 * 64
+
+# Duże modele z co najwyżej size / LOW_RANK_RATIO wzorcami nie tworzą macierzy wag
+LOW_RANK_RATIO = 2
+
+# Opisy przyczyn zakończenia odtwarzania wyświetlane przy numerze iteracji
+STOP_REASON_LABELS = {
+	'pattern': "wzorzec treningowy",
+	'fixed_point': "punkt stały",
+	'cycle': "cykl 2",
+	'energy': "stała energia",
+	'max_iterations': "limit iteracji",
+}
 
 # Importy do wyeksportowania wyników, oficjalnie niezaimplementowany element, bez kontrolek w UI
 #import sys
@@ -33,6 +52,11 @@ class ModelTestView(BaseView):
 		self.grid_width = 28
 		self.grid_height = 28
 		self.recall_history = []
+		self.stop_reason = None
+		self.trained_patterns = []
+		# Wagi wczytane z pliku nie muszą być wagami uczenia na jego wzorcach,
+		# więc taki model nie jest aktualizowany poprawkami, tylko uczony od nowa
+		self.model_from_file = False
 		self.accuracy_table = None
 		self.setup_ui()
 		
@@ -183,6 +207,33 @@ class ModelTestView(BaseView):
 		self.synchronous_checkbox.setFont(QFont("Segoe UI", 12))
 		self.synchronous_checkbox.setChecked(True)
 		layout.addWidget(self.synchronous_checkbox)
+
+		self.projection_checkbox = QCheckBox("Reguła rzutowania")
+		self.projection_checkbox.setFont(QFont("Segoe UI", 12))
+		self.projection_checkbox.setChecked(False)
+		self.projection_checkbox.toggled.connect(self.retrain_model)
+		layout.addWidget(self.projection_checkbox)
+
+		self.modern_checkbox = QCheckBox("Sieć nowoczesna (softmax)")
+		self.modern_checkbox.setFont(QFont("Segoe UI", 12))
+		self.modern_checkbox.setChecked(False)
+		layout.addWidget(self.modern_checkbox)
+
+		beta_layout = QHBoxLayout()
+		
+		beta_label = QLabel("β:")
+		beta_label.setFont(QFont("Segoe UI", 12))
+		beta_layout.addWidget(beta_label)
+		
+		self.beta_spinbox = QDoubleSpinBox()
+		self.beta_spinbox.setRange(0.01, 100.0)
+		self.beta_spinbox.setSingleStep(0.1)
+		self.beta_spinbox.setValue(1.0)
+		self.beta_spinbox.setFont(QFont("Segoe UI", 12))
+		self.beta_spinbox.setMinimumHeight(25)
+		beta_layout.addWidget(self.beta_spinbox)
+		
+		layout.addLayout(beta_layout)
 		
 		# Główny przycisk odtwarzania
 		recall_button = QPushButton("Odtwórz wzorzec")
@@ -364,15 +415,7 @@ class ModelTestView(BaseView):
 		noise_level = self.noise_spinbox.value() / 100.0
 		current_pixels = self.input_canvas.get_pixels()
 		
-		n_flip = int(noise_level * current_pixels.size)
-		if n_flip == 0:
-			return
-		
-		flat_pixels = current_pixels.flatten()
-		flip_indices = np.random.choice(len(flat_pixels), n_flip, replace=False)
-		flat_pixels[flip_indices] *= -1
-		
-		noisy_pixels = flat_pixels.reshape(current_pixels.shape)
+		noisy_pixels = Probes.flip_noise(current_pixels[np.newaxis], noise_level)[0]
 		self.input_canvas.set_pixels(noisy_pixels)
 	
 	def load_selected_pattern(self):
@@ -412,14 +455,19 @@ class ModelTestView(BaseView):
 		early_stopping = self.early_stopping_checkbox.isChecked()
 		
 		try:
-			states_history, energy_history = self.model.recall(
+			states_history, energy_history, info = self.recall_model().recall(
 				input_pattern, 
 				synchronous=synchronous,
 				max_iterations=max_iterations,
-				energy_tol=1e-9 if early_stopping else 0
+				energy_tol=1e-9 if early_stopping else 0,
+				history='compact',
+				state_stopping=early_stopping,
+				stop_patterns=self.trained_patterns if early_stopping else None,
+				return_info=True
 			)
 			
 			self.recall_history = states_history
+			self.stop_reason = info['stop_reason']
 			
 			# Zaktualizuj zakres suwaka
 			self.iteration_slider.setMaximum(len(states_history) - 1)
@@ -449,7 +497,10 @@ class ModelTestView(BaseView):
 		"""Aktualizuje etykietę z numerem iteracji"""
 		current = self.iteration_slider.value()
 		total = self.iteration_slider.maximum()
-		self.iteration_value_label.setText(f"{current} / {total}")
+		text = f"{current} / {total}"
+		if self.stop_reason and current == total:
+			text += f" ({STOP_REASON_LABELS[self.stop_reason]})"
+		self.iteration_value_label.setText(text)
 	
 	def plot_energy(self, energy_history):
 		"""Rysuje wykres zmian energii podczas odtwarzania"""
@@ -470,15 +521,11 @@ class ModelTestView(BaseView):
 		if not self.patterns:
 			return []
 		
-		accuracies = []
-		
-		for i, pattern in enumerate(self.patterns):
-			matches = np.sum(output_pattern == pattern)
-			accuracy = (matches / pattern.size) * 100
-			
-			accuracies.append((i + 1, accuracy))
+		# Porównanie z całą macierzą wzorców naraz
+		matches = self.patterns.matrix() == np.ravel(output_pattern)
+		accuracies = np.mean(matches, axis=1) * 100
 		
-		return accuracies
+		return [(i + 1, accuracy) for i, accuracy in enumerate(accuracies)]
 	
 	def update_accuracy_table(self, output_pattern):
 		"""Aktualizuje tabelę zgodności wzorców"""
@@ -501,47 +548,137 @@ class ModelTestView(BaseView):
 	
 	def set_model_data(self, patterns, existing_model=None):
 		"""Ustawia dane modelu z wzorcami i opcjonalnie istniejącym modelem"""
-		self.patterns = patterns
 		if len(patterns) <= 0:
 			return
 		
-		pattern_shape = patterns[0].shape
+		self.patterns = PatternSet.from_patterns(patterns)
+		pattern_shape = self.patterns.shape
 		self.grid_height, self.grid_width = pattern_shape
 		
 		if existing_model is not None:
 			self.model = existing_model
 		else:
-			self.model = Hopfield(self.grid_width * self.grid_height)
-			self.model.train(patterns)
+			size = self.grid_width * self.grid_height
+			self.model = Hopfield(size, **self.model_options(size, len(self.patterns)))
+			self.model.train(self.patterns)
 		
+		self.trained_patterns = self.patterns
+		self.model_from_file = existing_model is not None
 		self.create_canvases()
 
 	def set_patterns_and_train(self, patterns):
 		"""Ustawia wzorce i trenuje nowy model"""
-		self.patterns = patterns
-
-		if len(self.patterns) <= 0:
+		if len(patterns) <= 0:
 			return
 		
-		self.grid_height, self.grid_width = self.patterns[0].shape
+		self.patterns = PatternSet.from_patterns(patterns)
+		self.grid_height, self.grid_width = self.patterns.shape
 		
-		self.model = Hopfield(self.grid_width * self.grid_height)
-		self.model.train(patterns)
+		size = self.grid_width * self.grid_height
+		if (self.model is None or self.model_from_file or self.model.size != size or self.model.learning_rule != self.learning_rule()
+				or not self.update_model_patterns(self.trained_patterns, self.patterns)):
+			self.model = Hopfield(size, **self.model_options(size, len(self.patterns)))
+			self.model.train(self.patterns)
 		
+		self.trained_patterns = self.patterns
+		self.model_from_file = False
 		self.create_canvases()
 		self.update_pattern_spinbox_range()
+
+	def retrain_model(self):
+		"""Trenuje model od nowa na aktualnych wzorcach z wybraną regułą uczenia"""
+		if not self.patterns:
+			return
+		
+		size = self.grid_width * self.grid_height
+		self.model = Hopfield(size, **self.model_options(size, len(self.patterns)))
+		self.model.train(self.patterns)
+		self.trained_patterns = self.patterns
+		self.model_from_file = False
+
+	def recall_model(self):
+		"""
+		Zwraca sieć używaną do odtwarzania.
+
+		Sieć nowoczesna przechowuje tylko wzorce, więc tworzona jest na
+		bieżąco z wytrenowanych wzorców i wybranego β.
+		"""
+		if not self.modern_checkbox.isChecked():
+			return self.model
+
+		model = ModernHopfield(self.model.size, beta=self.beta_spinbox.value())
+		model.train(self.trained_patterns)
+		return model
+
+	def learning_rule(self):
+		"""Zwraca regułę uczenia wybraną w interfejsie"""
+		return 'projection' if self.projection_checkbox.isChecked() else 'hebbian'
+
+	def update_model_patterns(self, previous_patterns, patterns):
+		"""
+		Aktualizuje istniejący model o różnicę między zbiorami wzorców.
+
+		Zwraca False, gdy pełne ponowne uczenie jest tańsze.
+		"""
+		previous = {}
+		for pattern in previous_patterns:
+			previous.setdefault(self.pattern_key(pattern), []).append(pattern)
+
+		added = []
+		for pattern in patterns:
+			matching = previous.get(self.pattern_key(pattern))
+			if matching:
+				matching.pop()
+			else:
+				added.append(pattern)
+
+		removed = [pattern for matching in previous.values() for pattern in matching]
+
+		if len(added) + len(removed) >= len(patterns):
+			return False
+		if removed and self.model.learning_rule == 'projection':
+			return False
+
+		if removed:
+			self.model.remove_patterns(removed)
+		if added:
+			self.model.add_patterns(added)
+		return True
+
+	def model_options(self, size, pattern_count):
+		"""
+		Dobiera regułę uczenia i sposób przechowywania wag.
+
+		Reguła rzutowania wymaga pełnej macierzy float64. Dla reguły Hebba
+		duże sieci z niewieloma wzorcami liczą wagi w przestrzeni wzorców,
+		pozostałe przechowują spakowane liczniki int16.
+		"""
+		if self.learning_rule() == 'projection':
+			return {'learning_rule': 'projection'}
+		if size < LARGE_MODEL_SIZE:
+			return {}
+		if pattern_count * LOW_RANK_RATIO <= size:
+			return {'storage': 'lowrank'}
+		return {'weight_dtype': np.int16, 'storage': 'packed'}
+
+	@staticmethod
+	def pattern_key(pattern):
+		"""Zwraca klucz porównujący zawartość wzorca"""
+		return np.asarray(pattern, dtype=np.int8).tobytes()
 	
 	def import_model_data(self, model_data):
 		"""Importuje pełne dane modelu z pliku"""
-		self.patterns = model_data['patterns']
-		
-		if len(self.patterns) <= 0:
+		if len(model_data['patterns']) <= 0:
 			return
 		
-		self.grid_height, self.grid_width = self.patterns[0].shape
+		self.patterns, self.model = ModelIO.model_from_data(model_data)
+		self.grid_height, self.grid_width = self.patterns.shape
 		
-		size = len(model_data['biases'])
-		self.model = Hopfield(size, model_data['weights'], model_data['biases'])
+		self.projection_checkbox.blockSignals(True)
+		self.projection_checkbox.setChecked(self.model.learning_rule == 'projection')
+		self.projection_checkbox.blockSignals(False)
+		self.trained_patterns = self.patterns
+		self.model_from_file = True
 		
 		self.create_canvases()
 		self.update_pattern_spinbox_range()
@@ -552,11 +689,11 @@ class ModelTestView(BaseView):
 	
 	def export_model(self):
 		"""Eksportuje aktualny model do pliku"""
-		ModelIO.export_model(self, self.patterns, self.model)
+		Dialogs.export_model(self, self.patterns, self.model)
 	
 	def import_model(self):
 		"""Importuje model z pliku"""
-		model_data = ModelIO.import_model(self)
+		model_data = Dialogs.import_model(self)
 		if model_data:
 			self.import_model_data(model_data)
 
@@ -0,0 +1,295 @@
+import time
+
+import numpy as np
+
+from Hopfield import FIELD_TIE_TOL, RECALL_PHASES, Hopfield, collect_steps, lap_time, read_only_view
+
+class ModernHopfield():
+	"""
+	Nowoczesna (ciągła) sieć Hopfielda - gęsta pamięć asocjacyjna.
+
+	Stan ξ aktualizowany jest regułą ξ ← Xᵀ softmax(β X ξ), gdzie X to
+	macierz (P, N) zapamiętanych wzorców. Dla dostatecznie dużego β wzorzec
+	odtwarzany jest w jednym kroku, a pojemność rośnie wykładniczo z N.
+	Sieć nie ma macierzy wag - przechowuje tylko wzorce.
+
+	Attributes
+	----------
+	size : int
+		Rozmiar sieci (liczba neuronów).
+	beta : float
+		Odwrotność temperatury softmax.
+	patterns : ndarray
+		Macierz int8 (P, N) zapamiętanych wzorców.
+	pattern_count : int
+		Liczba zapamiętanych wzorców.
+	"""
+
+	def __init__(self, size, beta=1.0):
+		"""
+		Inicjalizuje sieć.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów w sieci.
+		beta : float, default 1.0
+			Odwrotność temperatury softmax. Małe β uśrednia wzorce, duże β
+			wybiera najbliższy wzorzec.
+		"""
+		if beta <= 0:
+			raise ValueError("Parametr beta musi być dodatni")
+
+		self.size = size
+		self.beta = beta
+		self.patterns = np.empty((0, size), dtype=np.int8)
+
+	@property
+	def pattern_count(self):
+		"""Liczba zapamiętanych wzorców"""
+		return len(self.patterns)
+
+	def train(self, patterns):
+		"""
+		Zapamiętuje wzorce, zastępując poprzednie.
+
+		Parameters
+		----------
+		patterns : list of ndarray or PatternSet
+			Lista wzorców z wartościami 1/-1.
+		"""
+		self.patterns = self._pattern_matrix(patterns)
+
+	def add_patterns(self, patterns):
+		"""Dopisuje wzorce do zapamiętanych."""
+		self.patterns = np.concatenate([self.patterns, self._pattern_matrix(patterns)])
+
+	def remove_patterns(self, patterns):
+		"""Usuwa wzorce (każdy raz) z zapamiętanych."""
+		keep = np.ones(self.pattern_count, dtype=bool)
+		for row in self._pattern_matrix(patterns):
+			matches = np.flatnonzero(keep & np.all(self.patterns == row, axis=1))
+			if matches.size == 0:
+				raise ValueError("Usuwany wzorzec nie jest zapamiętany w sieci")
+			keep[matches[0]] = False
+
+		self.patterns = self.patterns[keep]
+
+	def _pattern_matrix(self, patterns):
+		"""Układa wzorce (lista, tablica lub PatternSet) w macierz int8 (P, N)."""
+		matrix = np.asarray(patterns)
+		if len(matrix) == 0:
+			raise ValueError("Brak wzorców")
+
+		matrix = matrix.reshape(len(matrix), -1)
+		if matrix.shape[1] != self.size:
+			raise ValueError(f"Wzorce muszą mieć {self.size} elementów")
+
+		return np.where(matrix > 0, np.int8(1), np.int8(-1))
+
+	def retrieve(self, queries):
+		"""
+		Wykonuje jeden krok odtwarzania ξ ← Xᵀ softmax(β X ξ).
+
+		Parameters
+		----------
+		queries : ndarray
+			Pojedynczy stan (N,) lub macierz stanów (B, N) albo (B, wys, szer).
+
+		Returns
+		-------
+		ndarray
+			Ciągłe stany po kroku, (N,) dla pojedynczego stanu lub (B, N).
+		"""
+		if self.pattern_count == 0:
+			raise ValueError("Sieć nie zapamiętała żadnych wzorców")
+
+		queries = np.asarray(queries, dtype=np.float64)
+		single = queries.ndim == 1
+		queries = queries.reshape(-1, self.size)
+
+		xi = self.patterns.astype(np.float64)
+		scores = self.beta * np.dot(queries, xi.T)
+		scores -= scores.max(axis=1, keepdims=True)
+		weights = np.exp(scores)
+		weights /= weights.sum(axis=1, keepdims=True)
+
+		result = np.dot(weights, xi)
+		return result[0] if single else result
+
+	def energy(self, state):
+		"""
+		Oblicza energię stanu: -lse(β, X ξ) / β + ξ·ξ / 2.
+
+		Parameters
+		----------
+		state : ndarray
+			Stan sieci (wektor neuronów, może być ciągły).
+
+		Returns
+		-------
+		float
+			Wartość energii dla danego stanu.
+		"""
+		return self._batch_energy(np.reshape(state, (1, self.size)))[0]
+
+	def _batch_energy(self, states):
+		"""Oblicza energię dla każdego wiersza macierzy stanów (B, N)."""
+		states = np.asarray(states, dtype=np.float64)
+		scores = self.beta * np.dot(states, self.patterns.T.astype(np.float64))
+		peak = scores.max(axis=1)
+		lse = peak + np.log(np.exp(scores - peak[:, np.newaxis]).sum(axis=1))
+
+		return -lse / self.beta + 0.5 * np.einsum('ij,ij->i', states, states)
+
+	def recall(self, input_pattern, synchronous=True, max_iterations=10, energy_tol=1e-9, history='full', keyframe_interval=None, block_size=1, state_stopping=True, stop_patterns=None, return_info=False, rng=None, observer=None):
+		"""
+		Odtwarza wzorzec na podstawie wejściowego wzorca.
+
+		Sygnatura jest zgodna z Hopfield.recall, historia zbierana jest
+		z recall_steps. Krok odtwarzania zawsze obejmuje cały stan, więc
+		synchronous, block_size i rng są ignorowane.
+		Historia zawiera stany zbinaryzowane (1/-1), a energia liczona jest
+		dla stanów ciągłych.
+
+		Parameters
+		----------
+		input_pattern : ndarray
+			Wzorzec wejściowy do odtworzenia.
+		max_iterations : int, default 10
+			Maksymalna liczba iteracji.
+		energy_tol : float, default 1e-9
+			Tolerancja zmiany energii do zatrzymania algorytmu.
+		history : {'full', 'compact'}, default 'full'
+			'full' - lista kopii stanu po każdym kroku.
+			'compact' - obiekt RecallHistory.
+		keyframe_interval : int, optional
+			Odstęp klatek kluczowych historii zwartej. Domyślnie rozmiar sieci.
+		state_stopping : bool, default True
+			Zatrzymanie po kroku, który nie zmienił zbinaryzowanego stanu.
+		stop_patterns : iterable of ndarray, optional
+			Wzorce, po osiągnięciu których odtwarzanie jest przerywane.
+		return_info : bool, default False
+			Czy zwrócić dodatkowo słownik z przyczyną zatrzymania.
+		observer : Metrics.Observer, optional
+			Obserwator iteracji, jak w Hopfield.recall.
+
+		Returns
+		-------
+		tuple
+			(states_history, energy_history) lub, dla return_info=True,
+			(states_history, energy_history, info) jak w Hopfield.recall.
+		"""
+		if history not in ('full', 'compact'):
+			raise ValueError(f"Nieznany tryb historii: {history}")
+		compact = history == 'compact'
+
+		timings = dict.fromkeys(RECALL_PHASES, 0.0) if observer is not None else None
+		steps = self.recall_steps(input_pattern, synchronous, max_iterations, energy_tol, block_size, state_stopping, stop_patterns, rng, timings)
+		return collect_steps(steps, compact, keyframe_interval or self.size, return_info, observer, timings=timings)
+
+	def recall_steps(self, input_pattern, synchronous=True, max_iterations=10, energy_tol=1e-9, block_size=1, state_stopping=True, stop_patterns=None, rng=None, timings=None):
+		"""
+		Generator kolejnych kroków odtwarzania, jak Hopfield.recall_steps.
+
+		Krok retrieve liczony jest jako faza pól ('field_time').
+
+		Yields
+		------
+		tuple
+			(step, state, energy, flips) - numer kroku, widok zbinaryzowanego
+			stanu, energia stanu ciągłego i indeksy zmienionych neuronów.
+
+		Returns
+		-------
+		dict
+			Słownik info jak w recall (wartość StopIteration).
+		"""
+		stop_keys = {Hopfield._state_key(pattern) for pattern in stop_patterns} if stop_patterns is not None else set()
+
+		state = input_pattern.flatten()
+		continuous = state.astype(np.float64)
+		energy = self.energy(continuous)
+		yield 0, read_only_view(state), energy, np.empty(0, dtype=np.intp)
+
+		stop_reason = None
+		iterations = 0
+
+		for iteration in range(max_iterations):
+			if timings is not None:
+				clock = time.perf_counter()
+			continuous = self.retrieve(continuous)
+			if timings is not None:
+				clock = lap_time(timings, 'field_time', clock)
+			previous_state, state = state, np.where(continuous >= -FIELD_TIE_TOL, 1, -1).astype(state.dtype)
+			flipped = np.flatnonzero(state != previous_state)
+
+			previous_energy, energy = energy, self.energy(continuous)
+			if timings is not None:
+				lap_time(timings, 'energy_time', clock)
+			yield iteration + 1, read_only_view(state), energy, flipped
+
+			iterations = iteration + 1
+
+			if stop_keys and Hopfield._state_key(state) in stop_keys:
+				stop_reason = 'pattern'
+			elif state_stopping and flipped.size == 0:
+				stop_reason = 'fixed_point'
+			elif abs(energy - previous_energy) < energy_tol:
+				stop_reason = 'energy'
+
+			if stop_reason:
+				break
+
+		return {'stop_reason': stop_reason or 'max_iterations', 'iterations': iterations}
+
+	def recall_batch(self, states, max_iterations=10, energy_tol=1e-9):
+		"""
+		Odtwarza wiele wzorców jednocześnie.
+
+		Każda iteracja to dwa mnożenia macierzy dla wszystkich aktywnych
+		próbek. Próbki, które osiągnęły zbieżność, są maskowane.
+
+		Parameters
+		----------
+		states : ndarray
+			Wzorce wejściowe o kształcie (B, N) lub (B, wys, szer).
+		max_iterations : int, default 10
+			Maksymalna liczba iteracji.
+		energy_tol : float, default 1e-9
+			Tolerancja zmiany energii do zatrzymania danej próbki.
+
+		Returns
+		-------
+		tuple
+			(states, iterations, energies) - zbinaryzowane stany końcowe
+			(B, N), liczba wykonanych iteracji (B,) i energie ciągłych stanów
+			końcowych (B,).
+		"""
+		states = np.asarray(states)
+		continuous = states.reshape(states.shape[0], -1).astype(np.float64)
+		batch_size = continuous.shape[0]
+
+		iterations = np.zeros(batch_size, dtype=int)
+		energies = self._batch_energy(continuous)
+		active = np.arange(batch_size)
+
+		for iteration in range(max_iterations):
+			if active.size == 0:
+				break
+
+			new_states = self.retrieve(continuous[active])
+			new_energies = self._batch_energy(new_states)
+
+			continuous[active] = new_states
+			iterations[active] += 1
+			converged = np.abs(new_energies - energies[active]) < energy_tol
+			energies[active] = new_energies
+
+			active = active[~converged]
+
+		return np.where(continuous >= -FIELD_TIE_TOL, 1, -1), iterations, energies
+
+if __name__ == "__main__":
+	import app
+	app.main()
@@ -0,0 +1,265 @@
+import inspect
+import os
+from multiprocessing import Pool, Queue, shared_memory
+
+import numpy as np
+
+from Hopfield import TRAIN_CHUNK_SIZE, Hopfield
+from WeightStorage import STORAGES, TILE_BYTES, MemmapWeights
+
+# Model odtworzony w procesie roboczym z wag w pamięci współdzielonej
+_worker_model = None
+_worker_memory = None
+
+# Magazyny buforów częściowych liczników (widoki pamięci współdzielonej)
+# i kolejka numerów wolnych buforów
+_worker_storages = None
+_worker_slots = None
+
+# Magazyny, dla których uczenie dzieli się na częściowe macierze Grama
+PARALLEL_TRAIN_STORAGES = ('dense', 'packed')
+
+# Argumenty Hopfield.recall i Hopfield.recall_steps (odtwarzanie bez historii)
+RECALL_OPTIONS = frozenset(inspect.signature(Hopfield.recall).parameters) - {'self', 'input_pattern'}
+RECALL_STEP_OPTIONS = frozenset(inspect.signature(Hopfield.recall_steps).parameters) - {'self', 'input_pattern'}
+
+# Domyślna największa liczba buforów częściowych liczników - każdy ma
+# rozmiar danych wag, niezależnie od liczby procesów
+PARALLEL_TRAIN_BUFFERS = 4
+
+def parallel_recall(model, patterns, processes=None, seed=None, chunksize=1, keep_history=False, **recall_options):
+	"""
+	Odtwarza wiele wzorców równolegle w puli procesów.
+
+	Dane wag modelu kopiowane są raz do pamięci współdzielonej (wagi
+	w pliku mapowanym w pamięć są otwierane bezpośrednio), a procesy
+	robocze tworzą na nich widoki przy starcie, więc wagi nie są
+	serializowane dla każdego zadania. Każde zadanie dostaje własny
+	generator losowy z SeedSequence(seed).spawn, dzięki czemu wyniki nie
+	zależą od liczby procesów ani przydziału zadań.
+
+	Parameters
+	----------
+	model : Hopfield
+		Wytrenowana sieć.
+	patterns : iterable of ndarray
+		Wzorce wejściowe.
+	processes : int, optional
+		Liczba procesów. Domyślnie liczba rdzeni.
+	seed : int, optional
+		Ziarno, z którego wyprowadzane są ziarna zadań.
+	chunksize : int, default 1
+		Liczba zadań przekazywanych procesowi naraz.
+	keep_history : bool, default False
+		True - zwracana jest pełna historia stanów i energii.
+		False - zwracany jest tylko stan końcowy i jego energia.
+	**recall_options
+		Argumenty przekazywane do Hopfield.recall. Informacje o przebiegu
+		są zwracane zawsze, więc return_info jest pomijany. Obserwator
+		i generator losowy nie mogą działać w innych procesach - losowość
+		ustala seed.
+
+	Returns
+	-------
+	list of tuple
+		Wyniki w kolejności wzorców wejściowych: (stan, energia, info) lub,
+		dla keep_history=True, (states_history, energy_history, info).
+	"""
+	unknown = set(recall_options) - RECALL_OPTIONS
+	if unknown:
+		raise TypeError(f"Nieznane argumenty odtwarzania: {', '.join(sorted(unknown))}")
+	if 'observer' in recall_options or 'rng' in recall_options:
+		raise ValueError("Odtwarzanie równoległe nie obsługuje argumentów observer i rng - ziarna zadań wyznacza seed")
+	recall_options = {key: value for key, value in recall_options.items() if key != 'return_info'}
+
+	patterns = list(patterns)
+	seeds = np.random.SeedSequence(seed).spawn(len(patterns))
+	tasks = [(pattern, task_seed, keep_history, recall_options) for pattern, task_seed in zip(patterns, seeds)]
+
+	options = {
+		'size': model.size,
+		'biases': model.biases,
+		'pattern_count': model.pattern_count,
+		'weight_scale': model.weight_scale,
+		'storage': model.storage.kind,
+		'learning_rule': model.learning_rule,
+	}
+
+	memory = None
+	data = model.storage.data
+	if model.storage.kind == MemmapWeights.kind:
+		# Procesy otwierają ten sam plik wag, więc nic nie jest kopiowane
+		model.storage.flush()
+		source = ('file', model.storage.path, data.dtype.str)
+	elif model.storage.kind not in STORAGES:
+		# Pozostałe magazyny (np. rzadkie) przekazywane są raz na proces
+		source = ('object', model.storage)
+	else:
+		memory = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+		np.ndarray(data.shape, dtype=data.dtype, buffer=memory.buf)[...] = data
+		source = ('shared', memory.name, data.shape, data.dtype.str)
+
+	try:
+		with Pool(processes, initializer=_init_worker, initargs=(source, options)) as pool:
+			return list(pool.imap(_recall_task, tasks, chunksize))
+	finally:
+		if memory is not None:
+			memory.close()
+			memory.unlink()
+
+def parallel_train(model, patterns, processes=None, chunk_size=TRAIN_CHUNK_SIZE, progress=None, buffers=None):
+	"""
+	Uczy sieć regułą Hebba, dzieląc wzorce między procesy.
+
+	Proces dodaje macierz Grama porcji wzorców do wolnego bufora liczników
+	w pamięci współdzielonej (bufor jest zajęty na czas zadania), a na
+	końcu bufory są sumowane kafelkami do pierwszego z nich i scalane
+	z siecią przez Hopfield.merge_counts. Oprócz wag sieci zajmowane jest
+	buffers razy tyle pamięci co wagi. Liczniki są całkowite, więc wagi są
+	identyczne z uczeniem szeregowym. Reguła rzutowania i pozostałe
+	magazyny wag uczone są szeregowo przez train.
+
+	Parameters
+	----------
+	model : Hopfield
+		Sieć do wytrenowania (poprzednie wzorce są zastępowane).
+	patterns : list of ndarray, PatternSet or iterable
+		Wzorce do zapamiętania, jak w Hopfield.train.
+	processes : int, optional
+		Liczba procesów. Domyślnie liczba rdzeni.
+	chunk_size : int, default TRAIN_CHUNK_SIZE
+		Liczba wzorców w jednym zadaniu.
+	progress : callable, optional
+		Funkcja postępu progress(processed, total), jak w Hopfield.train.
+	buffers : int, optional
+		Liczba buforów liczników, czyli najwięcej jednocześnie liczonych
+		porcji. Domyślnie min(processes, PARALLEL_TRAIN_BUFFERS).
+	"""
+	if model.learning_rule != 'hebbian' or model.storage.kind not in PARALLEL_TRAIN_STORAGES:
+		model.train(patterns, chunk_size, progress)
+		return
+
+	processes = processes or os.cpu_count()
+	buffers = buffers or min(processes, PARALLEL_TRAIN_BUFFERS)
+	total = model._progress_total(patterns)
+
+	data = model.storage.data
+	memory = shared_memory.SharedMemory(create=True, size=max(buffers * data.nbytes, 1))
+	try:
+		partials = np.ndarray((buffers,) + data.shape, dtype=data.dtype, buffer=memory.buf)
+		partials.fill(0)
+
+		slots = Queue()
+		for slot in range(buffers):
+			slots.put(slot)
+
+		initargs = (memory.name, partials.shape, data.dtype.str, model.storage.kind, model.size, slots)
+		chunks = (matrix.astype(np.int8) for matrix in model._pattern_chunks(patterns, chunk_size))
+
+		count = 0
+		bias_sum = np.zeros(model.size)
+		with Pool(processes, initializer=_init_trainer, initargs=initargs) as pool:
+			for chunk_count, chunk_sum in pool.imap_unordered(_train_task, chunks):
+				count += chunk_count
+				bias_sum += chunk_sum
+				if progress is not None:
+					progress(count, total)
+
+		if count == 0:
+			raise ValueError("Brak wzorców")
+
+		# Moduł sumy liczników nie przekracza liczby wzorców, więc przy
+		# poprawnym zakresie suma mieści się w typie buforów
+		model._check_count_range(count)
+		counts = _reduce_partials(partials)
+
+		model.storage.clear()
+		model.biases.fill(0)
+		model.pattern_count = 0
+		model.merge_counts(counts, bias_sum, count)
+	finally:
+		memory.close()
+		memory.unlink()
+
+def _reduce_partials(partials):
+	"""
+	Sumuje bufory liczników do pierwszego z nich i go zwraca.
+
+	Sumowanie idzie kafelkami w typie o większym zakresie, więc nie powstaje
+	dodatkowa tablica rozmiaru wag.
+	"""
+	flat = partials.reshape(len(partials), -1)
+	wide = np.float64 if partials.dtype.kind == 'f' else np.int64
+	tile = max(1, TILE_BYTES // (8 * len(partials)))
+	for start in range(0, flat.shape[1], tile):
+		columns = slice(start, start + tile)
+		flat[0, columns] = flat[:, columns].sum(axis=0, dtype=wide)
+	return partials[0]
+
+def _init_trainer(name, shape, dtype, kind, size, slots):
+	"""Podłącza proces uczący do buforów liczników."""
+	global _worker_memory, _worker_storages, _worker_slots
+
+	_worker_memory = _attach(name)
+	partials = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_memory.buf)
+	_worker_storages = [STORAGES[kind](size, partial) for partial in partials]
+	_worker_slots = slots
+
+def _train_task(chunk):
+	"""Dodaje macierz Grama porcji wzorców do wolnego bufora liczników."""
+	matrix = chunk.astype(np.float64)
+	slot = _worker_slots.get()
+	try:
+		_worker_storages[slot].add_gram(matrix)
+	finally:
+		_worker_slots.put(slot)
+	return len(matrix), np.sum(matrix, axis=0)
+
+def _init_worker(source, options):
+	"""Podłącza proces roboczy do wag w pamięci współdzielonej lub w pliku."""
+	global _worker_model, _worker_memory
+
+	if source[0] == 'file':
+		_, path, dtype = source
+		options = dict(options, storage=MemmapWeights(options['size'], path, dtype=np.dtype(dtype), mode='r'))
+		_worker_model = Hopfield(**options)
+		return
+
+	if source[0] == 'object':
+		_worker_model = Hopfield(**dict(options, storage=source[1]))
+		return
+
+	_, name, shape, dtype = source
+	_worker_memory = _attach(name)
+	weights = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_memory.buf)
+	_worker_model = Hopfield(weights=weights, **options)
+
+def _attach(name):
+	"""Otwiera istniejący blok pamięci współdzielonej bez jego śledzenia."""
+	try:
+		return shared_memory.SharedMemory(name=name, track=False)
+	except TypeError:
+		# Python < 3.13 nie ma parametru track
+		return shared_memory.SharedMemory(name=name)
+
+def _recall_task(task):
+	"""Odtwarza jeden wzorzec w procesie roboczym."""
+	pattern, seed, keep_history, recall_options = task
+
+	pattern = np.asarray(pattern)
+	rng = np.random.default_rng(seed)
+	if keep_history:
+		return _worker_model.recall(pattern, return_info=True, rng=rng, **recall_options)
+
+	# Bez historii wystarczy ostatni krok generatora
+	options = {key: value for key, value in recall_options.items() if key in RECALL_STEP_OPTIONS}
+	steps = _worker_model.recall_steps(pattern, rng=rng, **options)
+	while True:
+		try:
+			step, state, energy, flips = next(steps)
+		except StopIteration as stop:
+			return state.copy(), energy, stop.value
+
+if __name__ == "__main__":
+	import app
+	app.main()
@@ -6,8 +6,12 @@ from PyQt6.QtGui import QFont
 
 from BaseView import BaseView
 from PixelGridCanvas import PixelGridCanvas
+from PatternSet import PatternSet
 import MNISTLoader
 
+# Maksymalny wymiar siatki - duże siatki z niewieloma wzorcami korzystają z sieci w przestrzeni wzorców
+MAX_GRID_SIZE = 256
+
 class PatternEditView(BaseView):
 	"""Widok do edycji wzorców do zapamiętania przez sieć"""
 	
@@ -19,7 +23,7 @@ class PatternEditView(BaseView):
 		self.canvas = None
 
 		self.current_pattern_id = -1
-		self.patterns = []
+		self.patterns = PatternSet((self.grid_height, self.grid_width))
 		self.pattern_buttons = []
 
 		self.setup_ui()
@@ -66,14 +70,14 @@ class PatternEditView(BaseView):
 		width_label.setFont(QFont("Segoe UI", 10))
 		self.width_spinbox = QSpinBox()
 		self.width_spinbox.setFont(QFont("Segoe UI", 10))
-		self.width_spinbox.setRange(1, 100)
+		self.width_spinbox.setRange(1, MAX_GRID_SIZE)
 		self.width_spinbox.setValue(self.grid_width)
 		
 		height_label = QLabel("Wys:")
 		height_label.setFont(QFont("Segoe UI", 10))
 		self.height_spinbox = QSpinBox()
 		self.height_spinbox.setFont(QFont("Segoe UI", 10))
-		self.height_spinbox.setRange(1, 100)
+		self.height_spinbox.setRange(1, MAX_GRID_SIZE)
 		self.height_spinbox.setValue(self.grid_height)
 		
 		confirm_dims_button = QPushButton("OK")
@@ -261,7 +265,7 @@ class PatternEditView(BaseView):
 			self.width_spinbox.setValue(self.grid_width)
 			self.create_canvas()
 		
-		self.patterns = patterns.copy()
+		self.patterns = PatternSet.from_patterns(patterns)
 		self.update_pattern_scroll_list()
 		self.select_pattern(0)
 
@@ -273,7 +277,7 @@ class PatternEditView(BaseView):
 	
 	def add_pattern(self):
 		"""Dodaje nowy pusty wzorzec"""
-		new_pattern = np.full((self.grid_height, self.grid_width), -1, dtype=int)
+		new_pattern = np.full((self.grid_height, self.grid_width), -1, dtype=np.int8)
 		self.patterns.append(new_pattern)
 		self.update_pattern_scroll_list()
 		self.select_pattern(len(self.patterns) - 1)
@@ -289,8 +293,8 @@ class PatternEditView(BaseView):
 	
 	def reset_patterns(self):
 		"""Resetuje wszystkie wzorce do jednego pustego"""
-		empty_pattern = np.full((self.grid_height, self.grid_width), -1, dtype=int)
-		self.patterns = [empty_pattern]
+		empty_pattern = np.full((self.grid_height, self.grid_width), -1, dtype=np.int8)
+		self.patterns = PatternSet((self.grid_height, self.grid_width), [empty_pattern])
 		self.update_pattern_scroll_list()
 		self.select_pattern(0)
 	
@@ -315,9 +319,9 @@ class PatternEditView(BaseView):
 
 			# Przekaż aktualne wymiary grida
 			patterns = MNISTLoader.load_fashion_mnist_patterns(
-				self, target_size=(self.grid_width, self.grid_height), num_patterns=pattern_count
+				target_size=(self.grid_width, self.grid_height), num_patterns=pattern_count
 			)
-			if patterns is not None and len(patterns) > 0:
+			if len(patterns) > 0:
 				# Ustaw wzorce
 				self.set_patterns(patterns)
 				
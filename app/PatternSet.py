@@ -0,0 +1,183 @@
+import numpy as np
+
+class PatternSet():
+	"""
+	Zbiór wzorców binarnych przechowywanych w jednym ciągłym buforze.
+
+	Wzorce o wartościach 1/-1 zapisywane są jako wiersze dwuwymiarowej
+	tablicy int8 lub, w trybie spakowanym, jako bity w tablicy uint8.
+	Pojedyncze wzorce zwracane są jako widoki o kształcie siatki (bez
+	kopiowania w trybie int8).
+
+	Attributes
+	----------
+	shape : tuple of int
+		Kształt siatki pojedynczego wzorca (wysokość, szerokość).
+	size : int
+		Liczba pikseli pojedynczego wzorca.
+	packed : bool
+		Czy wzorce są spakowane bitowo.
+	"""
+
+	def __init__(self, shape, patterns=(), packed=False, capacity=0):
+		"""
+		Tworzy zbiór wzorców.
+
+		Parameters
+		----------
+		shape : tuple of int
+			Kształt siatki wzorca (wysokość, szerokość).
+		patterns : iterable of ndarray, optional
+			Wzorce dodawane na początku.
+		packed : bool, default False
+			True - wzorce spakowane bitowo (1 bit na piksel).
+			False - wzorce jako int8 (1 bajt na piksel).
+		capacity : int, default 0
+			Początkowa liczba wierszy zarezerwowanych w buforze.
+		"""
+		self.shape = tuple(shape)
+		self.size = int(np.prod(self.shape))
+		self.packed = packed
+
+		row_width = (self.size + 7) // 8 if packed else self.size
+		self._data = np.empty((capacity, row_width), dtype=np.uint8 if packed else np.int8)
+		self._count = 0
+
+		self.extend(patterns)
+
+	@classmethod
+	def from_patterns(cls, patterns, packed=False):
+		"""
+		Tworzy zbiór z listy wzorców, tablicy (P, wys, szer) lub innego zbioru.
+
+		Dane są zawsze kopiowane.
+		"""
+		if isinstance(patterns, PatternSet):
+			pattern_set = cls(patterns.shape, packed=packed, capacity=len(patterns))
+			pattern_set._append_rows(patterns.matrix())
+			return pattern_set
+
+		patterns = list(patterns)
+		if not patterns:
+			raise ValueError("Nie można ustalić kształtu pustego zbioru wzorców")
+
+		return cls(np.shape(patterns[0]), patterns, packed=packed, capacity=len(patterns))
+
+	def __len__(self):
+		"""Zwraca liczbę wzorców"""
+		return self._count
+
+	def __iter__(self):
+		"""Iteruje po wzorcach"""
+		for i in range(self._count):
+			yield self[i]
+
+	def __getitem__(self, index):
+		"""Zwraca wzorzec o kształcie siatki (widok w trybie int8)"""
+		if isinstance(index, slice):
+			# Wiersze bufora kopiowane są bez rozpakowywania całego zbioru
+			rows = self._data[:self._count][index]
+			pattern_set = PatternSet(self.shape, packed=self.packed, capacity=len(rows))
+			pattern_set._data[:len(rows)] = rows
+			pattern_set._count = len(rows)
+			return pattern_set
+
+		index = self._check_index(index)
+		row = self._data[index]
+		if self.packed:
+			row = self._unpack(row[np.newaxis])[0]
+
+		return row.reshape(self.shape)
+
+	def __setitem__(self, index, pattern):
+		"""Zastępuje wzorzec o podanym indeksie"""
+		index = self._check_index(index)
+		self._data[index] = self._encode(self._as_rows(pattern))[0]
+
+	def __delitem__(self, index):
+		"""Usuwa wzorzec o podanym indeksie"""
+		index = self._check_index(index)
+		self._data[index:self._count - 1] = self._data[index + 1:self._count]
+		self._count -= 1
+
+	def __array__(self, dtype=None, copy=None):
+		"""Zwraca macierz wzorców (P, N)"""
+		matrix = self.matrix()
+		if dtype is not None:
+			matrix = matrix.astype(dtype, copy=False)
+		return matrix.copy() if copy else matrix
+
+	def append(self, pattern):
+		"""Dodaje wzorzec na końcu zbioru"""
+		self._append_rows(self._as_rows(pattern))
+
+	def extend(self, patterns):
+		"""Dodaje wiele wzorców na końcu zbioru"""
+		for pattern in patterns:
+			self.append(pattern)
+
+	def copy(self):
+		"""Zwraca niezależną kopię zbioru"""
+		pattern_set = PatternSet(self.shape, packed=self.packed, capacity=self._count)
+		pattern_set._data[:self._count] = self._data[:self._count]
+		pattern_set._count = self._count
+		return pattern_set
+
+	def matrix(self):
+		"""
+		Zwraca wzorce jako macierz int8 (P, N).
+
+		W trybie int8 jest to widok bufora, w trybie spakowanym kopia.
+		"""
+		rows = self._data[:self._count]
+		return self._unpack(rows) if self.packed else rows
+
+	def to_array(self):
+		"""Zwraca wzorce jako tablicę int8 (P, wys, szer)"""
+		return self.matrix().reshape((self._count,) + self.shape)
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez wzorce"""
+		return self._data[:self._count].nbytes
+
+	def _check_index(self, index):
+		"""Sprawdza indeks i zamienia ujemny na dodatni"""
+		if index < 0:
+			index += self._count
+		if not 0 <= index < self._count:
+			raise IndexError("Indeks wzorca poza zakresem")
+		return index
+
+	def _as_rows(self, pattern):
+		"""Zamienia pojedynczy wzorzec na macierz (1, N)"""
+		if np.size(pattern) != self.size:
+			raise ValueError(f"Wzorzec musi mieć {self.size} elementów")
+		return np.reshape(pattern, (1, self.size))
+
+	def _append_rows(self, rows):
+		"""Dopisuje wiersze macierzy wzorców, powiększając bufor w razie potrzeby"""
+		required = self._count + len(rows)
+		if required > len(self._data):
+			capacity = max(required, 2 * len(self._data), 4)
+			data = np.empty((capacity, self._data.shape[1]), dtype=self._data.dtype)
+			data[:self._count] = self._data[:self._count]
+			self._data = data
+
+		self._data[self._count:required] = self._encode(rows)
+		self._count = required
+
+	def _encode(self, rows):
+		"""Koduje wiersze 1/-1 w formacie bufora"""
+		if self.packed:
+			return np.packbits(rows > 0, axis=1)
+		return np.where(rows > 0, np.int8(1), np.int8(-1))
+
+	def _unpack(self, rows):
+		"""Rozpakowuje bity do wartości int8 1/-1"""
+		bits = np.unpackbits(rows, axis=1, count=self.size).view(np.int8)
+		return bits * 2 - 1
+
+if __name__ == "__main__":
+	import app
+	app.main()
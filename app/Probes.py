@@ -0,0 +1,112 @@
+import numpy as np
+
+#	Wektorowe generowanie zniekształconych wzorców testowych. Wszystkie funkcje
+#	przyjmują macierz wzorców (B, wys, szer) z wartościami 1/-1 i zwracają nową
+#	tablicę o tym samym kształcie. rng to numpy.random.Generator, ziarno lub
+#	None (nowy generator z losowym ziarnem).
+
+def flip_noise(patterns, level, rng=None):
+	"""
+	Odwraca w każdym wzorcu int(level * N) losowo wybranych pikseli.
+
+	Parameters
+	----------
+	patterns : ndarray
+		Wzorce (B, wys, szer) lub (B, N).
+	level : float
+		Ułamek odwracanych pikseli (0 - 1, większe wartości jak 1).
+	rng : numpy.random.Generator or int, optional
+		Generator liczb losowych lub ziarno.
+	"""
+	rng = np.random.default_rng(rng)
+	patterns = np.asarray(patterns)
+	matrix = patterns.reshape(len(patterns), -1).copy()
+
+	n_flip = min(int(level * matrix.shape[1]), matrix.shape[1])
+	if n_flip > 0:
+		# Losowy wybór bez powtórzeń dla wszystkich wzorców naraz
+		keys = rng.random(matrix.shape)
+		flip = np.argpartition(keys, n_flip - 1, axis=1)[:, :n_flip]
+		np.put_along_axis(matrix, flip, -np.take_along_axis(matrix, flip, axis=1), axis=1)
+
+	return matrix.reshape(patterns.shape)
+
+def occlude(patterns, level, rng=None, fill=-1):
+	"""
+	Zasłania w każdym wzorcu kwadrat o polu około level * wys * szer.
+
+	Parameters
+	----------
+	patterns : ndarray
+		Wzorce (B, wys, szer).
+	level : float
+		Ułamek zasłanianej powierzchni (0 - 1, większe wartości jak 1).
+	rng : numpy.random.Generator or int, optional
+		Generator liczb losowych lub ziarno.
+	fill : int, default -1
+		Wartość pikseli zasłoniętego obszaru.
+	"""
+	rng = np.random.default_rng(rng)
+	patterns = np.array(patterns)
+	count, height, width = patterns.shape
+
+	side = int(round(np.sqrt(min(level, 1) * height * width)))
+	side_y, side_x = min(side, height), min(side, width)
+	if side_y == 0 or side_x == 0:
+		return patterns
+
+	top = rng.integers(0, height - side_y + 1, size=count)
+	left = rng.integers(0, width - side_x + 1, size=count)
+
+	rows = np.arange(height)[np.newaxis, :, np.newaxis]
+	cols = np.arange(width)[np.newaxis, np.newaxis, :]
+	inside = ((rows >= top[:, np.newaxis, np.newaxis]) & (rows < (top + side_y)[:, np.newaxis, np.newaxis])
+		& (cols >= left[:, np.newaxis, np.newaxis]) & (cols < (left + side_x)[:, np.newaxis, np.newaxis]))
+
+	patterns[inside] = fill
+	return patterns
+
+def shift(patterns, level, rng=None, fill=-1):
+	"""
+	Przesuwa każdy wzorzec o losowy wektor o składowych z zakresu [-level, level].
+
+	Parameters
+	----------
+	patterns : ndarray
+		Wzorce (B, wys, szer).
+	level : int
+		Największe przesunięcie w pikselach w każdej osi.
+	rng : numpy.random.Generator or int, optional
+		Generator liczb losowych lub ziarno.
+	fill : int, default -1
+		Wartość pikseli odsłoniętych przez przesunięcie.
+	"""
+	rng = np.random.default_rng(rng)
+	patterns = np.asarray(patterns)
+	count, height, width = patterns.shape
+
+	if level != int(level):
+		raise ValueError("Przesunięcie musi być całkowitą liczbą pikseli")
+	level = int(level)
+	dy, dx = rng.integers(-level, level + 1, size=(2, count))
+
+	# Piksel (y, x) wyniku pochodzi z (y - dy, x - dx) wzorca
+	rows = np.arange(height)[np.newaxis, :, np.newaxis] - dy[:, np.newaxis, np.newaxis]
+	cols = np.arange(width)[np.newaxis, np.newaxis, :] - dx[:, np.newaxis, np.newaxis]
+	valid = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+
+	samples = np.arange(count)[:, np.newaxis, np.newaxis]
+	shifted = patterns[samples, np.clip(rows, 0, height - 1), np.clip(cols, 0, width - 1)]
+
+	return np.where(valid, shifted, fill).astype(patterns.dtype, copy=False)
+
+# Rodzaje zniekształceń używane w przeglądach parametrów
+CORRUPTIONS = {
+	'flip': flip_noise,
+	'occlude': occlude,
+	'shift': shift,
+}
+
+if __name__ == "__main__":
+	import app
+	app.main()
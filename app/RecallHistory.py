@@ -0,0 +1,103 @@
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+class RecallHistory(Sequence):
+	"""
+	Zwarta historia stanów sieci podczas odtwarzania.
+
+	Zamiast kopii pełnego stanu po każdym kroku przechowywany jest stan
+	początkowy, indeksy neuronów zmienionych w kolejnych krokach oraz co
+	`keyframe_interval` kroków pełny stan (klatka kluczowa). Dowolny krok
+	jest odtwarzany na żądanie z najbliższej wcześniejszej klatki kluczowej.
+
+	Attributes
+	----------
+	keyframe_interval : int
+		Liczba kroków między klatkami kluczowymi.
+	dtype : numpy.dtype
+		Typ zwracanych stanów.
+	"""
+
+	def __init__(self, initial_state, keyframe_interval=256):
+		"""
+		Tworzy historię z podanym stanem początkowym.
+
+		Parameters
+		----------
+		initial_state : ndarray
+			Stan początkowy sieci z wartościami 1/-1.
+		keyframe_interval : int, default 256
+			Liczba kroków między zapisywanymi pełnymi stanami.
+		"""
+		if keyframe_interval < 1:
+			raise ValueError("Odstęp klatek kluczowych musi być dodatni")
+
+		self.keyframe_interval = keyframe_interval
+		self.dtype = initial_state.dtype
+
+		self._current = np.ravel(initial_state).astype(np.int8)
+		self._keyframes = [self._current.copy()]
+		self._flips = array('i')
+		self._offsets = array('q', [0])
+
+	def append(self, flipped):
+		"""
+		Dodaje kolejny krok do historii.
+
+		Parameters
+		----------
+		flipped : int, ndarray or None
+			Indeks lub tablica indeksów neuronów, które zmieniły stan
+			w tym kroku. None lub pusta tablica oznacza brak zmian.
+		"""
+		if flipped is None:
+			pass
+		elif np.ndim(flipped) == 0:
+			self._flips.append(int(flipped))
+			self._current[flipped] *= -1
+		else:
+			self._flips.frombytes(np.asarray(flipped, dtype=np.int32).tobytes())
+			self._current[flipped] *= -1
+
+		self._offsets.append(len(self._flips))
+
+		if (len(self._offsets) - 1) % self.keyframe_interval == 0:
+			self._keyframes.append(self._current.copy())
+
+	def __len__(self):
+		"""Zwraca liczbę zapisanych stanów (kroki + stan początkowy)"""
+		return len(self._offsets)
+
+	def __getitem__(self, index):
+		"""Odtwarza stan po danym kroku"""
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self)))]
+
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("Indeks historii poza zakresem")
+
+		keyframe = index // self.keyframe_interval
+		state = self._keyframes[keyframe].astype(self.dtype)
+
+		start = self._offsets[keyframe * self.keyframe_interval]
+		stop = self._offsets[index]
+		if stop > start:
+			flips = np.frombuffer(self._flips, dtype=np.int32)[start:stop]
+			parity = np.bincount(flips, minlength=state.size) % 2
+			state[parity == 1] *= -1
+
+		return state
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez historię"""
+		keyframes = sum(keyframe.nbytes for keyframe in self._keyframes)
+		return keyframes + self._current.nbytes + len(self._flips) * self._flips.itemsize + len(self._offsets) * self._offsets.itemsize
+
+if __name__ == "__main__":
+	import app
+	app.main()
@@ -0,0 +1,793 @@
+import numpy as np
+
+# Maksymalny rozmiar kafelka (w bajtach) tymczasowych macierzy float64
+TILE_BYTES = 8 * 1024 * 1024
+
+def count_limit(dtype):
+	"""Zwraca największy licznik wzorców dla całkowitego typu wag lub None."""
+	if np.issubdtype(dtype, np.integer):
+		return int(np.iinfo(dtype).max)
+	return None
+
+def row_tiles(size):
+	"""Dzieli wiersze macierzy N×N na kafelki mieszczące się w TILE_BYTES."""
+	tile_rows = max(1, TILE_BYTES // (8 * size))
+	for start in range(0, size, tile_rows):
+		yield slice(start, min(start + tile_rows, size))
+
+def _scatter(size, idx, values):
+	"""Zwraca wektor float64 długości size z values na pozycjach idx."""
+	vector = np.zeros(size)
+	vector[idx] = values
+	return vector
+
+class DenseWeights():
+	"""
+	Pełna macierz wag N×N.
+
+	Attributes
+	----------
+	size : int
+		Liczba neuronów.
+	data : ndarray
+		Macierz wag (N, N).
+	"""
+
+	kind = 'dense'
+
+	def __init__(self, size, data=None, dtype=None):
+		"""
+		Tworzy macierz wag.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów.
+		data : ndarray, optional
+			Istniejąca macierz wag (N, N). Jeśli None, inicjalizowana zerami.
+		dtype : dtype, optional
+			Typ wag. Domyślnie typ podanej macierzy lub float64.
+		"""
+		self.size = size
+
+		if data is None:
+			data = np.zeros((size, size), dtype=dtype or np.float64)
+		elif dtype is not None:
+			data = data.astype(dtype, copy=False)
+
+		self.data = data
+
+	@property
+	def dtype(self):
+		"""Typ przechowywanych wag"""
+		return self.data.dtype
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez wagi"""
+		return self.data.nbytes
+
+	@property
+	def count_limit(self):
+		"""Największa liczba wzorców, której liczniki mieszczą się w typie wag"""
+		return count_limit(self.data.dtype)
+
+	def matvec(self, state):
+		"""Zwraca iloczyn W @ state jako float64."""
+		if self.data.dtype == np.float64:
+			return np.dot(self.data, state)
+
+		fields = np.empty(self.size)
+		for rows in row_tiles(self.size):
+			fields[rows] = np.dot(self.data[rows].astype(np.float64), state)
+		return fields
+
+	def matmat(self, states):
+		"""Zwraca iloczyn states @ W.T dla macierzy stanów (B, N) jako float64."""
+		if self.data.dtype == np.float64:
+			return np.dot(states, self.data.T)
+
+		fields = np.empty((len(states), self.size))
+		for rows in row_tiles(self.size):
+			fields[:, rows] = np.dot(states, self.data[rows].astype(np.float64).T)
+		return fields
+
+	def column(self, i):
+		"""Zwraca kolumnę i macierzy wag."""
+		return self.data[:, i]
+
+	def columns_dot(self, idx, deltas):
+		"""Zwraca iloczyn W[:, idx] @ deltas jako float64."""
+		if 4 * len(idx) > self.size:
+			return self.matvec(_scatter(self.size, idx, deltas))
+		return np.dot(self.data[:, idx].astype(np.float64, copy=False), deltas)
+
+	def local_fields(self, state):
+		"""Zwraca pola lokalne stanu aktualizowane przyrostowo."""
+		return RunningFields(self, state)
+
+	def diagonal(self, i):
+		"""Zwraca element diagonalny W[i, i]."""
+		return self.data[i, i]
+
+	def add_gram(self, matrix, sign=1):
+		"""Dodaje sign * matrix.T @ matrix, kafelkami wierszy."""
+		for rows in row_tiles(self.size):
+			tile = np.dot(matrix[:, rows].T, matrix)
+			self.data[rows] += (sign * tile).astype(self.data.dtype, copy=False)
+
+	def zero_diagonal(self):
+		"""Zeruje przekątną macierzy wag."""
+		np.fill_diagonal(self.data, 0)
+
+	def clear(self):
+		"""Zeruje wszystkie wagi."""
+		self.data.fill(0)
+
+	def to_dense(self):
+		"""Zwraca pełną macierz wag (N, N)."""
+		return self.data
+
+class MemmapWeights(DenseWeights):
+	"""
+	Pełna macierz wag N×N w pliku mapowanym w pamięć.
+
+	Macierz nie musi mieścić się w RAM - wszystkie jądra czytają ją
+	kafelkami wierszy, a zamiast kolumn używane są ciągłe w pliku wiersze
+	(macierz jest symetryczna).
+
+	Attributes
+	----------
+	size : int
+		Liczba neuronów.
+	path : str
+		Ścieżka pliku z wagami.
+	data : numpy.memmap
+		Macierz wag (N, N) w pliku.
+	"""
+
+	kind = 'memmap'
+
+	def __init__(self, size, path, dtype=np.float64, mode='w+'):
+		"""
+		Tworzy lub otwiera plik z macierzą wag.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów.
+		path : str
+			Ścieżka pliku z wagami.
+		dtype : dtype, default float64
+			Typ wag.
+		mode : {'w+', 'r+', 'r'}, default 'w+'
+			'w+' - nowy plik wypełniony zerami.
+			'r+' - istniejący plik do odczytu i zapisu.
+			'r' - istniejący plik tylko do odczytu.
+		"""
+		self.size = size
+		self.path = path
+		self.data = np.memmap(path, dtype=dtype, mode=mode, shape=(size, size))
+
+	def matvec(self, state):
+		"""Zwraca iloczyn W @ state jako float64, kafelkami wierszy."""
+		fields = np.empty(self.size)
+		for rows in row_tiles(self.size):
+			fields[rows] = np.dot(self.data[rows].astype(np.float64, copy=False), state)
+		return fields
+
+	def matmat(self, states):
+		"""Zwraca iloczyn states @ W.T dla macierzy stanów (B, N), kafelkami wierszy."""
+		fields = np.empty((len(states), self.size))
+		for rows in row_tiles(self.size):
+			fields[:, rows] = np.dot(states, self.data[rows].astype(np.float64, copy=False).T)
+		return fields
+
+	def column(self, i):
+		"""Zwraca kolumnę i jako równy jej wiersz (ciągły w pliku)."""
+		return self.data[i]
+
+	def columns_dot(self, idx, deltas):
+		"""Zwraca iloczyn W[:, idx] @ deltas jako float64, z wierszy idx."""
+		if 4 * len(idx) > self.size:
+			return self.matvec(_scatter(self.size, idx, deltas))
+		return np.dot(deltas, self.data[idx].astype(np.float64, copy=False))
+
+	def flush(self):
+		"""Zapisuje zmiany na dysk."""
+		self.data.flush()
+
+class PackedWeights():
+	"""
+	Symetryczna macierz wag z zerową przekątną, spakowana do górnego trójkąta.
+
+	Przechowywane są tylko elementy W[i, j] dla j > i, wiersz po wierszu,
+	co zmniejsza pamięć o połowę względem pełnej macierzy.
+
+	Attributes
+	----------
+	size : int
+		Liczba neuronów.
+	data : ndarray
+		Jednowymiarowa tablica N(N-1)/2 elementów górnego trójkąta.
+	"""
+
+	kind = 'packed'
+
+	def __init__(self, size, data=None, dtype=None):
+		"""
+		Tworzy spakowaną macierz wag.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów.
+		data : ndarray, optional
+			Spakowany górny trójkąt lub pełna macierz (N, N), z której
+			brany jest górny trójkąt. Jeśli None, inicjalizowana zerami.
+		dtype : dtype, optional
+			Typ wag. Domyślnie typ podanych danych lub float64.
+		"""
+		self.size = size
+
+		# Początek wiersza i w spakowanej tablicy, wiersz i ma N-1-i elementów
+		rows = np.arange(size, dtype=np.int64)
+		self._offsets = rows * (size - 1) - rows * (rows - 1) // 2
+
+		if data is None:
+			data = np.zeros(size * (size - 1) // 2, dtype=dtype or np.float64)
+		elif data.ndim == 2:
+			data = self._pack(data, dtype or data.dtype)
+		elif dtype is not None:
+			data = data.astype(dtype, copy=False)
+
+		self.data = data
+
+	@property
+	def dtype(self):
+		"""Typ przechowywanych wag"""
+		return self.data.dtype
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez wagi"""
+		return self.data.nbytes
+
+	@property
+	def count_limit(self):
+		"""Największa liczba wzorców, której liczniki mieszczą się w typie wag"""
+		return count_limit(self.data.dtype)
+
+	def matvec(self, state):
+		"""Zwraca iloczyn W @ state = U @ state + U.T @ state jako float64."""
+		fields = np.zeros(self.size)
+		for rows in row_tiles(self.size):
+			tile = self._upper_rows(rows)
+			fields[rows] += np.dot(tile, state)
+			fields += np.dot(tile.T, state[rows])
+		return fields
+
+	def matmat(self, states):
+		"""Zwraca iloczyn states @ W.T dla macierzy stanów (B, N) jako float64."""
+		fields = np.zeros((len(states), self.size))
+		for rows in row_tiles(self.size):
+			tile = self._upper_rows(rows)
+			fields[:, rows] += np.dot(states, tile.T)
+			fields += np.dot(states[:, rows], tile)
+		return fields
+
+	def local_fields(self, state):
+		"""Zwraca pola lokalne stanu aktualizowane przyrostowo."""
+		return RunningFields(self, state)
+
+	def column(self, i):
+		"""Zwraca kolumnę (równą wierszowi) i macierzy wag."""
+		column = np.empty(self.size, dtype=self.data.dtype)
+
+		lower = np.arange(i)
+		column[:i] = self.data[self._offsets[:i] + (i - lower - 1)]
+		column[i] = 0
+		column[i + 1:] = self._row_segment(i)
+
+		return column
+
+	def columns_dot(self, idx, deltas):
+		"""Zwraca iloczyn W[:, idx] @ deltas jako float64."""
+		if 4 * len(idx) > self.size:
+			return self.matvec(_scatter(self.size, idx, deltas))
+
+		result = np.zeros(self.size)
+		for i, delta in zip(idx, deltas):
+			result += self.column(i) * float(delta)
+		return result
+
+	def diagonal(self, i):
+		"""Zwraca element diagonalny (zawsze 0)."""
+		return self.data.dtype.type(0)
+
+	def add_gram(self, matrix, sign=1):
+		"""Dodaje górny trójkąt sign * matrix.T @ matrix, kafelkami wierszy."""
+		for rows in row_tiles(self.size):
+			tile = np.dot(matrix[:, rows].T, matrix[:, rows.start:])
+			for k, i in enumerate(range(rows.start, rows.stop)):
+				self._row_segment(i)[...] += (sign * tile[k, k + 1:]).astype(self.data.dtype, copy=False)
+
+	def zero_diagonal(self):
+		"""Przekątna nie jest przechowywana, więc zawsze jest zerowa."""
+
+	def clear(self):
+		"""Zeruje wszystkie wagi."""
+		self.data.fill(0)
+
+	def to_dense(self):
+		"""Zwraca pełną symetryczną macierz wag (N, N)."""
+		dense = np.zeros((self.size, self.size), dtype=self.data.dtype)
+		for i in range(self.size):
+			segment = self._row_segment(i)
+			dense[i, i + 1:] = segment
+			dense[i + 1:, i] = segment
+		return dense
+
+	def _row_segment(self, i):
+		"""Zwraca widok elementów W[i, i+1:] w spakowanej tablicy."""
+		start = self._offsets[i]
+		return self.data[start:start + self.size - 1 - i]
+
+	def _upper_rows(self, rows):
+		"""Rozpakowuje kafelek wierszy górnego trójkąta do macierzy float64."""
+		tile = np.zeros((rows.stop - rows.start, self.size))
+		for k, i in enumerate(range(rows.start, rows.stop)):
+			tile[k, i + 1:] = self._row_segment(i)
+		return tile
+
+	def _pack(self, dense, dtype):
+		"""Pakuje górny trójkąt pełnej macierzy."""
+		self.data = np.empty(self.size * (self.size - 1) // 2, dtype=dtype)
+		for i in range(self.size):
+			self._row_segment(i)[...] = dense[i, i + 1:]
+		return self.data
+
+class LowRankWeights():
+	"""
+	Wagi Hebba w przestrzeni wzorców, bez macierzy N×N.
+
+	Nieskalowane wagi to W = X @ X.T - P * I, gdzie X to macierz (N, P)
+	zapamiętanych wzorców. Iloczyn W @ s liczony jest jako X @ (X.T @ s) - P * s
+	w czasie O(NP), a pamięć to N * P bajtów.
+
+	Attributes
+	----------
+	size : int
+		Liczba neuronów.
+	data : ndarray
+		Macierz int8 (N, P) - wzorce jako kolumny.
+	"""
+
+	kind = 'lowrank'
+
+	def __init__(self, size, data=None, dtype=None):
+		"""
+		Tworzy magazyn wzorców.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów.
+		data : ndarray, optional
+			Macierz (N, P) zapamiętanych wzorców. Jeśli None, pusta.
+		dtype : dtype, optional
+			Ignorowany - wzorce zawsze przechowywane są jako int8.
+		"""
+		self.size = size
+		if data is None:
+			data = np.empty((size, 0), dtype=np.int8)
+		self.data = data.astype(np.int8, copy=False)
+
+	@property
+	def dtype(self):
+		"""Typ przechowywanych wzorców"""
+		return self.data.dtype
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez wzorce"""
+		return self.data.nbytes
+
+	@property
+	def count_limit(self):
+		"""Liczba wzorców nie jest ograniczona typem danych"""
+		return None
+
+	@property
+	def pattern_count(self):
+		"""Liczba przechowywanych wzorców"""
+		return self.data.shape[1]
+
+	def matvec(self, state):
+		"""Zwraca iloczyn W @ state jako float64."""
+		xi = self.data.astype(np.float64)
+		return np.dot(xi, np.dot(xi.T, state)) - self.pattern_count * state
+
+	def matmat(self, states):
+		"""Zwraca iloczyn states @ W.T dla macierzy stanów (B, N) jako float64."""
+		xi = self.data.astype(np.float64)
+		return np.dot(np.dot(states, xi), xi.T) - self.pattern_count * states
+
+	def column(self, i):
+		"""Zwraca kolumnę i macierzy wag (koszt O(NP))."""
+		column = np.dot(self.data.astype(np.float64), self.data[i].astype(np.float64))
+		column[i] = 0
+		return column
+
+	def columns_dot(self, idx, deltas):
+		"""Zwraca iloczyn W[:, idx] @ deltas jako float64 (koszt O(NP))."""
+		overlaps = np.dot(self.data[idx].T.astype(np.float64), deltas)
+		result = np.dot(self.data, overlaps)
+		result[idx] -= self.pattern_count * deltas
+		return result
+
+	def diagonal(self, i):
+		"""Zwraca element diagonalny (zawsze 0)."""
+		return 0.0
+
+	def local_fields(self, state):
+		"""Zwraca pola lokalne liczone z nakładania się stanu na wzorce."""
+		return OverlapFields(self, state)
+
+	def add_gram(self, matrix, sign=1):
+		"""Dopisuje (sign=1) lub usuwa (sign=-1) wzorce z macierzy (k, N)."""
+		rows = np.where(matrix > 0, np.int8(1), np.int8(-1))
+		if sign > 0:
+			self.data = np.concatenate([self.data, rows.T], axis=1)
+			return
+
+		keep = np.ones(self.pattern_count, dtype=bool)
+		for row in rows:
+			matches = np.flatnonzero(keep & np.all(self.data == row[:, np.newaxis], axis=0))
+			if matches.size == 0:
+				raise ValueError("Usuwany wzorzec nie jest zapamiętany w sieci")
+			keep[matches[0]] = False
+
+		self.data = self.data[:, keep]
+
+	def zero_diagonal(self):
+		"""Przekątna jest odejmowana w jądrach, więc zawsze jest zerowa."""
+
+	def clear(self):
+		"""Usuwa wszystkie wzorce."""
+		self.data = self.data[:, :0]
+
+	def to_dense(self):
+		"""Zwraca pełną macierz nieskalowanych wag (N, N)."""
+		xi = self.data.astype(np.float64)
+		dense = np.dot(xi, xi.T)
+		np.fill_diagonal(dense, 0)
+		return dense
+
+class SparseWeights():
+	"""
+	Symetryczna rzadka macierz wag w formacie CSR.
+
+	Połączenia (struktura) ustalane są przy tworzeniu - z sąsiedztwa na
+	siatce wzorca lub przez odcięcie małych wag Hebba - a uczenie zmienia
+	tylko wartości istniejących połączeń. Koszt jąder jest proporcjonalny do
+	liczby połączeń E zamiast N².
+
+	Attributes
+	----------
+	size : int
+		Liczba neuronów.
+	indptr : ndarray
+		Początki wierszy w tablicach indices i data (N + 1 elementów).
+	indices : ndarray
+		Numery kolumn połączeń, rosnąco w każdym wierszu.
+	data : ndarray
+		Wagi połączeń.
+	"""
+
+	kind = 'sparse'
+
+	def __init__(self, size, indptr, indices, data=None, dtype=None):
+		"""
+		Tworzy rzadką macierz wag o podanej strukturze.
+
+		Parameters
+		----------
+		size : int
+			Liczba neuronów.
+		indptr : ndarray
+			Początki wierszy (N + 1 elementów).
+		indices : ndarray
+			Numery kolumn połączeń. Struktura musi być symetryczna i bez
+			przekątnej.
+		data : ndarray, optional
+			Wagi połączeń. Jeśli None, inicjalizowane zerami.
+		dtype : dtype, optional
+			Typ wag. Domyślnie typ podanych wag lub float64.
+		"""
+		self.size = size
+		self.indptr = np.asarray(indptr, dtype=np.int64)
+		self.indices = np.asarray(indices, dtype=np.int64)
+
+		if data is None:
+			data = np.zeros(len(self.indices), dtype=dtype or np.float64)
+		elif dtype is not None:
+			data = data.astype(dtype, copy=False)
+
+		self.data = data
+
+		# Numer wiersza każdego połączenia, do sum po wierszach
+		self._rows = np.repeat(np.arange(size), np.diff(self.indptr))
+
+	@classmethod
+	def local(cls, shape, radius, dtype=None):
+		"""
+		Tworzy połączenia pikseli siatki odległych co najwyżej o radius.
+
+		Parameters
+		----------
+		shape : tuple of int
+			Kształt siatki wzorca (wysokość, szerokość).
+		radius : float
+			Promień pola recepcyjnego (odległość euklidesowa w pikselach).
+		dtype : dtype, optional
+			Typ wag.
+		"""
+		height, width = shape
+		reach = int(radius)
+		y, x = np.divmod(np.arange(height * width), width)
+
+		rows, cols = [], []
+		for dy in range(-reach, reach + 1):
+			for dx in range(-reach, reach + 1):
+				if (dy, dx) == (0, 0) or dy * dy + dx * dx > radius * radius:
+					continue
+				valid = (y + dy >= 0) & (y + dy < height) & (x + dx >= 0) & (x + dx < width)
+				rows.append(np.flatnonzero(valid))
+				cols.append(rows[-1] + dy * width + dx)
+
+		return cls._from_edges(height * width, np.concatenate(rows), np.concatenate(cols), dtype)
+
+	@classmethod
+	def pruned(cls, patterns, density, dtype=None):
+		"""
+		Tworzy połączenia o największych co do modułu wagach Hebba.
+
+		Wagi Hebba są całkowitymi licznikami z zakresu [-P, P], więc próg
+		wyznaczany jest dokładnie z histogramu liczników liczonego kafelkami
+		wierszy, bez tworzenia macierzy N×N. Połączenia o module równym
+		progowi dobierane są parami (i, j), (j, i) w kolejności wierszy, aż do
+		osiągnięcia docelowej liczby połączeń.
+
+		Parameters
+		----------
+		patterns : ndarray
+			Macierz wzorców (P, N) z wartościami 1/-1.
+		density : float
+			Docelowy ułamek zachowanych połączeń (0, 1]. Zerowe wagi nie są
+			zachowywane, więc gęstość może być mniejsza. Musi pozostać co
+			najmniej jedna para połączeń (i, j), (j, i).
+		dtype : dtype, optional
+			Typ wag.
+		"""
+		if not 0 < density <= 1:
+			raise ValueError("Gęstość musi należeć do przedziału (0, 1]")
+
+		matrix = np.asarray(patterns, dtype=np.float64)
+		pattern_count, size = matrix.shape
+
+		histogram = np.zeros(pattern_count + 2, dtype=np.int64)
+		for rows, counts in cls._count_tiles(matrix):
+			histogram += np.bincount(counts.ravel(), minlength=pattern_count + 2)
+
+		# Najwyższy próg, przy którym zostaje co najmniej docelowa liczba
+		# połączeń; kept[t] to liczba liczników o module >= t
+		target = int(density * size * (size - 1))
+		if target < 2:
+			raise ValueError("Gęstość jest zbyt mała - nie zostaje żadne połączenie")
+		kept = np.cumsum(histogram[::-1])[::-1]
+		threshold = max(1, int(np.flatnonzero(kept >= target)[-1]))
+		tie_pairs = max(0, target - int(kept[threshold + 1])) // 2
+
+		edges_rows, edges_cols = [], []
+		for rows, counts in cls._count_tiles(matrix):
+			tile_rows, tile_cols = np.nonzero(counts > threshold)
+			edges_rows.append(tile_rows + rows.start)
+			edges_cols.append(tile_cols)
+
+			tie_rows, tie_cols = np.nonzero(counts == threshold)
+			tie_rows += rows.start
+			upper = tie_cols > tie_rows
+			tie_rows, tie_cols = tie_rows[upper][:tie_pairs], tie_cols[upper][:tie_pairs]
+			tie_pairs -= len(tie_rows)
+			edges_rows += [tie_rows, tie_cols]
+			edges_cols += [tie_cols, tie_rows]
+
+		return cls._from_edges(size, np.concatenate(edges_rows), np.concatenate(edges_cols), dtype)
+
+	@classmethod
+	def _count_tiles(cls, matrix):
+		"""Zwraca kafelki modułów liczników Hebba z wyzerowaną przekątną."""
+		size = matrix.shape[1]
+		for rows in row_tiles(size):
+			counts = np.abs(np.dot(matrix[:, rows].T, matrix)).astype(np.int64)
+			counts[np.arange(rows.stop - rows.start), np.arange(rows.start, rows.stop)] = 0
+			yield rows, counts
+
+	@classmethod
+	def _from_edges(cls, size, rows, cols, dtype):
+		"""Tworzy macierz z listy połączeń (wiersz, kolumna)."""
+		order = np.lexsort((cols, rows))
+		indptr = np.zeros(size + 1, dtype=np.int64)
+		np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+		return cls(size, indptr, cols[order], dtype=dtype)
+
+	@property
+	def dtype(self):
+		"""Typ przechowywanych wag"""
+		return self.data.dtype
+
+	@property
+	def nbytes(self):
+		"""Liczba bajtów zajmowanych przez wagi i strukturę"""
+		return self.data.nbytes + self.indices.nbytes + self.indptr.nbytes + self._rows.nbytes
+
+	@property
+	def count_limit(self):
+		"""Największa liczba wzorców, której liczniki mieszczą się w typie wag"""
+		return count_limit(self.data.dtype)
+
+	@property
+	def density(self):
+		"""Ułamek istniejących połączeń spośród N(N-1) możliwych"""
+		return len(self.indices) / max(1, self.size * (self.size - 1))
+
+	def matvec(self, state):
+		"""Zwraca iloczyn W @ state jako float64 w czasie O(E)."""
+		products = self.data * np.asarray(state, dtype=np.float64)[self.indices]
+		return np.bincount(self._rows, weights=products, minlength=self.size)
+
+	def matmat(self, states):
+		"""Zwraca iloczyn states @ W.T dla macierzy stanów (B, N) jako float64."""
+		fields = np.zeros((len(states), self.size))
+		if len(self.indices) == 0:
+			return fields
+
+		# Sumy po wierszach przez reduceat tylko dla niepustych wierszy - ich
+		# początki rosną ściśle, więc każdy odcinek kończy się na następnym
+		nonempty = np.flatnonzero(np.diff(self.indptr))
+		starts = self.indptr[nonempty]
+		batch = max(1, TILE_BYTES // (8 * len(self.indices)))
+		for start in range(0, len(states), batch):
+			products = self.data * np.asarray(states[start:start + batch], dtype=np.float64)[:, self.indices]
+			fields[start:start + batch, nonempty] = np.add.reduceat(products, starts, axis=1)
+		return fields
+
+	def column(self, i):
+		"""Zwraca kolumnę (równą wierszowi) i macierzy wag."""
+		column = np.zeros(self.size, dtype=self.data.dtype)
+		edges = slice(self.indptr[i], self.indptr[i + 1])
+		column[self.indices[edges]] = self.data[edges]
+		return column
+
+	def columns_dot(self, idx, deltas):
+		"""Zwraca iloczyn W[:, idx] @ deltas jako float64 w czasie O(N + E_idx)."""
+		starts, stops = self.indptr[idx], self.indptr[np.asarray(idx) + 1]
+		lengths = stops - starts
+		edges = np.repeat(stops - np.cumsum(lengths), lengths) + np.arange(lengths.sum())
+		weights = self.data[edges] * np.repeat(np.asarray(deltas, dtype=np.float64), lengths)
+		return np.bincount(self.indices[edges], weights=weights, minlength=self.size)
+
+	def local_fields(self, state):
+		"""Zwraca pola lokalne aktualizowane tylko na sąsiadach neuronu."""
+		return SparseFields(self, state)
+
+	def diagonal(self, i):
+		"""Zwraca element diagonalny (zawsze 0)."""
+		return self.data.dtype.type(0)
+
+	def add_gram(self, matrix, sign=1):
+		"""Dodaje sign * matrix.T @ matrix na istniejących połączeniach."""
+		batch = max(1, TILE_BYTES // (8 * max(1, len(matrix))))
+		for start in range(0, len(self.indices), batch):
+			edges = slice(start, start + batch)
+			counts = np.einsum('pe,pe->e', matrix[:, self._rows[edges]], matrix[:, self.indices[edges]])
+			self.data[edges] += (sign * counts).astype(self.data.dtype, copy=False)
+
+	def zero_diagonal(self):
+		"""Struktura nie zawiera przekątnej, więc zawsze jest zerowa."""
+
+	def clear(self):
+		"""Zeruje wszystkie wagi."""
+		self.data.fill(0)
+
+	def to_dense(self):
+		"""Zwraca pełną macierz wag (N, N)."""
+		dense = np.zeros((self.size, self.size), dtype=self.data.dtype)
+		dense[self._rows, self.indices] = self.data
+		return dense
+
+class RunningFields():
+	"""Pola lokalne W @ s aktualizowane kolumną wag po każdej zmianie neuronu."""
+
+	def __init__(self, storage, state):
+		"""Liczy pola lokalne dla stanu początkowego."""
+		self.storage = storage
+		self.fields = storage.matvec(state)
+
+	def field(self, i):
+		"""Zwraca pole lokalne neuronu i."""
+		return self.fields[i]
+
+	def flip(self, i, delta):
+		"""Uwzględnia zmianę stanu neuronu i o delta."""
+		self.fields += self.storage.column(i) * float(delta)
+
+	def block(self, idx):
+		"""Zwraca pola lokalne neuronów idx."""
+		return self.fields[idx]
+
+	def flip_block(self, idx, deltas):
+		"""
+		Uwzględnia jednoczesną zmianę neuronów idx o deltas.
+
+		Zwraca zmianę pól tych neuronów, czyli W[idx][:, idx] @ deltas.
+		"""
+		change = self.storage.columns_dot(idx, deltas)
+		self.fields += change
+		return change[idx]
+
+class SparseFields(RunningFields):
+	"""Pola lokalne rzadkiej macierzy - zmiana neuronu aktualizuje tylko sąsiadów."""
+
+	def flip(self, i, delta):
+		"""Uwzględnia zmianę stanu neuronu i o delta w czasie O(stopień i)."""
+		edges = slice(self.storage.indptr[i], self.storage.indptr[i + 1])
+		self.fields[self.storage.indices[edges]] += self.storage.data[edges] * float(delta)
+
+class OverlapFields():
+	"""
+	Pola lokalne w przestrzeni wzorców.
+
+	Przechowuje nakładania m = X.T @ s, więc pole neuronu i to
+	X[i] @ m - P * s[i], a zmiana neuronu aktualizuje m w czasie O(P).
+	"""
+
+	def __init__(self, storage, state):
+		"""Liczy nakładania stanu na wzorce."""
+		self.xi = storage.data
+		self.state = state
+		self.pattern_count = storage.pattern_count
+		self.overlaps = np.dot(self.xi.T.astype(np.float64), state)
+
+	def field(self, i):
+		"""Zwraca pole lokalne neuronu i (przed zmianą jego stanu)."""
+		return np.dot(self.xi[i], self.overlaps) - self.pattern_count * self.state[i]
+
+	def flip(self, i, delta):
+		"""Uwzględnia zmianę stanu neuronu i o delta."""
+		self.overlaps += self.xi[i] * float(delta)
+
+	def block(self, idx):
+		"""Zwraca pola lokalne neuronów idx (przed zmianą ich stanu)."""
+		return np.dot(self.xi[idx], self.overlaps) - self.pattern_count * self.state[idx]
+
+	def flip_block(self, idx, deltas):
+		"""
+		Uwzględnia jednoczesną zmianę neuronów idx o deltas.
+
+		Zwraca zmianę pól tych neuronów, czyli W[idx][:, idx] @ deltas.
+		"""
+		change = np.dot(self.xi[idx].T.astype(np.float64), deltas)
+		self.overlaps += change
+		return np.dot(self.xi[idx], change) - self.pattern_count * deltas
+
+STORAGES = {
+	DenseWeights.kind: DenseWeights,
+	PackedWeights.kind: PackedWeights,
+	LowRankWeights.kind: LowRankWeights,
+}
+
+if __name__ == "__main__":
+	import app
+	app.main()
@@ -0,0 +1,237 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+import ModelIO
+from Hopfield import TRAIN_CHUNK_SIZE, Hopfield
+from Metrics import MetricsCollector
+from PatternSet import PatternSet
+
+#	Uruchamianie uczenia i odtwarzania z wiersza poleceń, bez interfejsu
+#	graficznego (np. zadania nocne na serwerze):
+#
+#	python app/cli.py train WZORCE -o model.hop
+#	python app/cli.py recall model.hop PRÓBKI -o stany.npy --metrics wyniki.csv
+#
+#	Źródłem wzorców i próbek może być plik .npy (P, wys, szer) lub (P, N),
+#	plik modelu (.hop lub .pkl), folder z obrazami albo 'fashion-mnist'.
+#	Pliki modeli mają ten sam format co eksport z aplikacji.
+
+# Domyślny kształt wzorców wczytywanych z obrazów
+DEFAULT_SHAPE = (28, 28)
+
+# Typy macierzy wag obsługiwane przez Hopfield
+WEIGHT_DTYPES = ('int8', 'int16', 'int32', 'float32', 'float64')
+
+def weight_dtype(name):
+	"""Typ argumentu --weight-dtype i --save-dtype."""
+	if name not in WEIGHT_DTYPES:
+		raise argparse.ArgumentTypeError(f"nieobsługiwany typ wag '{name}' (dostępne: {', '.join(WEIGHT_DTYPES)})")
+	return np.dtype(name)
+
+def read_patterns(source, shape=None, limit=None):
+	"""
+	Wczytuje wzorce ze źródła do PatternSet.
+
+	Parameters
+	----------
+	source : str
+		Plik .npy, plik modelu (.hop lub .pkl), folder z obrazami lub 'fashion-mnist'.
+	shape : tuple of int, optional
+		Kształt wzorca (wys, szer). Obrazy są do niego skalowane, a płaskie
+		tablice (P, N) przekształcane. Domyślnie kształt ze źródła lub 28×28.
+	limit : int, optional
+		Największa liczba wczytywanych wzorców.
+	"""
+	if source == 'fashion-mnist' or os.path.isdir(source):
+		# Ładowanie obrazów wymaga PIL (i datasets dla Fashion-MNIST)
+		import MNISTLoader
+
+		height, width = shape or DEFAULT_SHAPE
+		if source == 'fashion-mnist':
+			images = MNISTLoader.iter_fashion_mnist_patterns("train", (width, height), limit)
+		else:
+			images = MNISTLoader.iter_folder_patterns(source, (width, height))
+
+		patterns = PatternSet((height, width))
+		for index, image in enumerate(images):
+			if limit is not None and index >= limit:
+				break
+			patterns.append(image)
+		return patterns
+
+	if source.endswith(('.hop', '.pkl')):
+		array = np.asarray(ModelIO.load_model_data(source)['patterns'])
+	else:
+		array = np.load(source)
+
+	if array.ndim == 2:
+		if shape is None:
+			side = int(round(np.sqrt(array.shape[1])))
+			if side * side != array.shape[1]:
+				raise ValueError(f"Podaj kształt wzorców o {array.shape[1]} pikselach (--shape)")
+			shape = (side, side)
+		array = array.reshape((len(array),) + tuple(shape))
+	elif array.ndim != 3:
+		raise ValueError(f"Tablica wzorców musi mieć kształt (P, N) lub (P, wys, szer), a ma {array.shape}")
+	elif shape is not None and tuple(shape) != array.shape[1:]:
+		raise ValueError(f"Wzorce mają kształt {array.shape[1:]}, oczekiwano {tuple(shape)}")
+
+	if limit is not None:
+		array = array[:limit]
+	return PatternSet.from_patterns(np.where(array > 0, 1, -1).astype(np.int8))
+
+def write_metrics(path, rows):
+	"""Zapisuje wiersze wyników do pliku CSV lub, dla rozszerzenia .json, JSON."""
+	if path.endswith('.json'):
+		with open(path, 'w') as f:
+			json.dump(rows, f, indent=2)
+		return
+
+	with open(path, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['probe'])
+		writer.writeheader()
+		writer.writerows(rows)
+
+def save_options(args):
+	"""Zwraca opcje zapisu modelu w formacie binarnym."""
+	if args.output.endswith('.pkl'):
+		return {}
+	return {
+		'weight_dtype': args.save_dtype,
+		'include_weights': not args.no_weights,
+		'compression': 'zlib' if args.compress else None,
+	}
+
+def train(args):
+	"""Polecenie train: uczy sieć na wzorcach ze źródła i zapisuje model."""
+	patterns = read_patterns(args.source, args.shape, args.limit)
+	if len(patterns) == 0:
+		raise ValueError("Brak wzorców")
+
+	options = {'storage': args.storage, 'learning_rule': args.learning_rule}
+	if args.weight_dtype:
+		options['weight_dtype'] = args.weight_dtype
+	model = Hopfield(patterns.size, **options)
+
+	collector = MetricsCollector()
+	if args.processes > 1:
+		from Parallel import parallel_train
+		parallel_train(model, patterns, args.processes, args.chunk_size)
+	else:
+		model.train(patterns, args.chunk_size, observer=collector)
+
+	ModelIO.save_model(args.output, patterns, model, **save_options(args))
+	if args.metrics and collector.runs:
+		write_metrics(args.metrics, collector.runs[-1]['records'])
+
+	print(f"Wytrenowano sieć {patterns.shape[0]}x{patterns.shape[1]} na {model.pattern_count} wzorcach, zapisano {args.output}")
+
+def recall(args):
+	"""Polecenie recall: odtwarza próbki i zapisuje stany końcowe oraz wyniki."""
+	patterns, model = ModelIO.load_model(args.model)
+	probes = read_patterns(args.probes, patterns.shape, args.limit)
+	if len(probes) == 0:
+		raise ValueError("Brak próbek")
+
+	recall_options = {
+		'synchronous': args.mode == 'sync',
+		'max_iterations': args.max_iterations,
+		'block_size': args.block_size,
+		'history': 'compact',
+	}
+
+	collector = MetricsCollector() if args.trace else None
+	if args.processes > 1:
+		from Parallel import parallel_recall
+		results = parallel_recall(model, probes, args.processes, args.seed, **recall_options)
+	else:
+		results = []
+		for probe, seed in zip(probes, np.random.SeedSequence(args.seed).spawn(len(probes))):
+			states_history, energy_history, info = model.recall(np.asarray(probe), return_info=True,
+				rng=np.random.default_rng(seed), observer=collector, **recall_options)
+			results.append((states_history[-1], energy_history[-1], info))
+
+	states = np.array([state for state, energy, info in results], dtype=np.int8)
+	np.save(args.output, states.reshape((len(states),) + patterns.shape))
+
+	# Najbliższy zapamiętany wzorzec każdego stanu końcowego
+	overlaps = np.dot(states.astype(np.float64), patterns.matrix().T.astype(np.float64)) / model.size
+	nearest = np.argmax(overlaps, axis=1)
+
+	rows = []
+	for index, (state, energy, info) in enumerate(results):
+		rows.append({
+			'probe': index,
+			'iterations': info['iterations'],
+			'stop_reason': info['stop_reason'],
+			'energy': float(energy),
+			'nearest_pattern': int(nearest[index]),
+			'overlap': float(overlaps[index, nearest[index]]),
+			'recalled': bool(overlaps[index, nearest[index]] == 1),
+		})
+
+	if args.metrics:
+		write_metrics(args.metrics, rows)
+	if collector is not None:
+		collector.to_json(args.trace)
+
+	recalled = sum(row['recalled'] for row in rows)
+	print(f"Odtworzono {recalled}/{len(rows)} próbek jako zapamiętane wzorce, stany zapisano w {args.output}")
+
+def build_parser():
+	"""Tworzy parser argumentów z poleceniami train i recall."""
+	parser = argparse.ArgumentParser(description="Sieć Hopfielda bez interfejsu graficznego")
+	commands = parser.add_subparsers(dest='command', required=True)
+
+	train_parser = commands.add_parser('train', help="uczy sieć i zapisuje model")
+	train_parser.add_argument('source', help="plik .npy, .hop lub .pkl, folder z obrazami albo 'fashion-mnist'")
+	train_parser.add_argument('-o', '--output', required=True, help="plik modelu .hop (lub .pkl)")
+	train_parser.add_argument('--shape', type=int, nargs=2, metavar=('WYS', 'SZER'))
+	train_parser.add_argument('--limit', type=int, help="największa liczba wzorców")
+	train_parser.add_argument('--learning-rule', choices=('hebbian', 'projection'), default='hebbian')
+	train_parser.add_argument('--storage', choices=('dense', 'packed', 'lowrank'), default='dense')
+	train_parser.add_argument('--weight-dtype', type=weight_dtype, help="typ macierzy wag, np. int16 (domyślnie float64)")
+	train_parser.add_argument('--chunk-size', type=int, default=TRAIN_CHUNK_SIZE)
+	train_parser.add_argument('--processes', type=int, default=1)
+	train_parser.add_argument('--metrics', help="plik CSV/JSON z czasami porcji uczenia (tylko w jednym procesie)")
+	train_parser.add_argument('--save-dtype', type=weight_dtype, help="typ zapisywanych wag, np. int16 (domyślnie typ sieci)")
+	train_parser.add_argument('--no-weights', action='store_true', help="zapisuje tylko wzorce, wagi są liczone przy wczytaniu")
+	train_parser.add_argument('--compress', action='store_true', help="kompresja zlib (wagi nie są wtedy mapowane w pamięć)")
+	train_parser.set_defaults(handler=train)
+
+	recall_parser = commands.add_parser('recall', help="odtwarza próbki wytrenowaną siecią")
+	recall_parser.add_argument('model', help="plik modelu .hop lub .pkl")
+	recall_parser.add_argument('probes', help="plik .npy, .hop lub .pkl, folder z obrazami albo 'fashion-mnist'")
+	recall_parser.add_argument('-o', '--output', required=True, help="plik .npy ze stanami końcowymi")
+	recall_parser.add_argument('--limit', type=int, help="największa liczba próbek")
+	recall_parser.add_argument('--mode', choices=('sync', 'async'), default='sync')
+	recall_parser.add_argument('--block-size', type=int, default=1)
+	recall_parser.add_argument('--max-iterations', type=int, default=10)
+	recall_parser.add_argument('--seed', type=int)
+	recall_parser.add_argument('--processes', type=int, default=1)
+	recall_parser.add_argument('--metrics', help="plik CSV/JSON z wynikiem każdej próbki")
+	recall_parser.add_argument('--trace', help="plik JSON z pomiarami każdej iteracji (tylko w jednym procesie)")
+	recall_parser.set_defaults(handler=recall)
+
+	return parser
+
+def main(argv=None):
+	parser = build_parser()
+	args = parser.parse_args(argv)
+
+	# Pomiary porcji zbiera tylko uczenie w jednym procesie
+	if args.command == 'train' and args.metrics and args.processes > 1:
+		parser.error("--metrics wymaga --processes 1")
+	try:
+		args.handler(args)
+	except (OSError, ValueError) as e:
+		print(f"Błąd: {e}", file=sys.stderr)
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
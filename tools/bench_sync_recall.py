@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from Hopfield import FIELD_TIE_TOL, Hopfield
+
+#	Mikrobenchmark synchronicznego odtwarzania: jedno mnożenie przez W na
+#	iterację (pole lokalne użyte też do energii, bufory stanu) wobec
+#	wcześniejszej pętli z osobnym wywołaniem energy() i np.where.
+
+def reference_recall(model, state, max_iterations):
+	"""Synchroniczne odtwarzanie z dwoma mnożeniami przez W na iterację."""
+	energy_history = [model.energy(state)]
+	for iteration in range(max_iterations):
+		activation = model.storage.matvec(state)
+		state = np.where(activation >= -FIELD_TIE_TOL, 1, -1)
+		energy_history.append(model.energy(state))
+	return state, energy_history
+
+def measure(function, repeats):
+	"""Zwraca najkrótszy czas wykonania funkcji (w sekundach)."""
+	best = float('inf')
+	for _ in range(repeats):
+		start = time.perf_counter()
+		function()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+def main(sizes=(256, 1024, 4096), pattern_count=20, iterations=20, repeats=5):
+	"""Porównuje czas iteracji dla kilku rozmiarów sieci."""
+	rng = np.random.default_rng(0)
+
+	print(f"{'N':>6} {'przed [ms]':>12} {'po [ms]':>10} {'przyspieszenie':>15}")
+	for size in sizes:
+		model = Hopfield(size)
+		model.train(rng.choice([-1, 1], size=(pattern_count, size)))
+
+		# Losowy stan startowy, a wczesne zatrzymanie wyłączone, aby obie
+		# wersje wykonały tę samą liczbę iteracji
+		state = rng.choice([-1, 1], size=size)
+		before = measure(lambda: reference_recall(model, state.copy(), iterations), repeats)
+		after = measure(lambda: model.recall(state.copy(), max_iterations=iterations, energy_tol=0, state_stopping=False, history='compact'), repeats)
+
+		print(f"{size:>6} {before * 1000:>12.2f} {after * 1000:>10.2f} {before / after:>14.2f}x")
+
+if __name__ == "__main__":
+	main()
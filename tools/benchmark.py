@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import Probes
+from Hopfield import Hopfield
+from cli import weight_dtype
+
+#	Zestaw benchmarków uczenia, energii i odtwarzania (synchronicznego
+#	i asynchronicznego) dla siatek od 8×8 do 128×128. Dla każdego przypadku
+#	zapisywany jest najkrótszy czas, szczytowe zużycie pamięci (tracemalloc)
+#	i liczba iteracji odtwarzania. Wyniki można zapisać jako plik bazowy JSON
+#	i porównać z nim kolejne uruchomienia - regresje kończą program kodem 1.
+
+BASELINE_VERSION = 1
+
+CASES = ('train', 'energy', 'recall_sync', 'recall_async')
+
+PATTERN_KINDS = ('random', 'mnist')
+
+def random_patterns(count, grid, rng):
+	"""Losowe wzorce 1/-1 (count, grid, grid)."""
+	return rng.choice(np.array([-1, 1], dtype=np.int8), size=(count, grid, grid))
+
+def mnist_like_patterns(count, grid, rng):
+	"""
+	Syntetyczne wzorce podobne do zbinaryzowanego Fashion-MNIST.
+
+	Każdy wzorzec to wygładzony losowy kształt skupiony w środku siatki
+	(kilka niskich częstotliwości plus gaussowska maska), progowany tak,
+	aby około 40% pikseli było białych. Wzorce są więc skorelowane ze sobą
+	jak prawdziwe obrazy, bez pobierania zbioru danych.
+	"""
+	coords = np.linspace(-1, 1, grid)
+	y, x = np.meshgrid(coords, coords, indexing='ij')
+	mask = np.exp(-(x ** 2 + y ** 2) / 0.5)
+
+	patterns = np.empty((count, grid, grid), dtype=np.int8)
+	for k in range(count):
+		freq = rng.uniform(0.5, 3.0, size=(4, 2))
+		phase = rng.uniform(0, 2 * np.pi, size=4)
+		texture = sum(np.cos(np.pi * (fy * y + fx * x) + p) for (fy, fx), p in zip(freq, phase))
+		image = mask * (2 + 0.5 * texture)
+		patterns[k] = np.where(image >= np.quantile(image, 0.6), 1, -1)
+	return patterns
+
+def fashion_mnist_patterns(count, grid, rng):
+	"""Prawdziwe wzorce Fashion-MNIST (wymaga pakietu datasets i sieci)."""
+	from MNISTLoader import iter_fashion_mnist_patterns
+	return np.array(list(iter_fashion_mnist_patterns("test", (grid, grid), count)), dtype=np.int8)
+
+def make_patterns(kind, count, grid, seed, real_mnist=False):
+	"""Zwraca wzorce danego rodzaju, deterministyczne dla danego ziarna."""
+	rng = np.random.default_rng([seed, grid])
+	if kind == 'random':
+		return random_patterns(count, grid, rng)
+	if real_mnist:
+		return fashion_mnist_patterns(count, grid, rng)
+	return mnist_like_patterns(count, grid, rng)
+
+def measure(function, repeats):
+	"""
+	Mierzy funkcję: najkrótszy czas z repeats wywołań i szczytową pamięć.
+
+	Pamięć mierzona jest w osobnym wywołaniu pod tracemalloc, żeby narzut
+	śledzenia alokacji nie zawyżał czasów.
+
+	Returns
+	-------
+	tuple
+		(wall_time, peak_memory, result) - czas w sekundach, szczyt
+		przydzielonej pamięci w bajtach i wynik ostatniego wywołania.
+	"""
+	best = float('inf')
+	for _ in range(repeats):
+		start = time.perf_counter()
+		result = function()
+		best = min(best, time.perf_counter() - start)
+
+	tracemalloc.start()
+	try:
+		function()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	return best, peak, result
+
+def run_case(case, patterns, probes, options):
+	"""
+	Wykonuje jeden przypadek i zwraca słownik z wynikami pomiaru.
+
+	Sieć do pomiaru energii i odtwarzania uczona jest raz, poza pomiarem.
+	Odtwarzanie asynchroniczne używa stałego ziarna dla każdej próbki,
+	więc liczba iteracji (suma dla wszystkich próbek) jest powtarzalna.
+	"""
+	size = patterns[0].size
+	weight_dtype = options['weight_dtype']
+	repeats = options['repeats']
+	max_iterations = options['max_iterations']
+
+	if case == 'train':
+		def train():
+			model = Hopfield(size, weight_dtype=weight_dtype)
+			model.train(patterns)
+		wall_time, peak, _ = measure(train, repeats)
+		return {'wall_time': wall_time, 'peak_memory': peak, 'iterations': None}
+
+	model = Hopfield(size, weight_dtype=weight_dtype)
+	model.train(patterns)
+	states = probes.reshape(len(probes), -1)
+
+	if case == 'energy':
+		wall_time, peak, _ = measure(lambda: [model.energy(state) for state in states], repeats)
+		return {'wall_time': wall_time, 'peak_memory': peak, 'iterations': None}
+
+	synchronous = case == 'recall_sync'
+	def recall():
+		iterations = []
+		for i, state in enumerate(states):
+			states_history, energy_history, info = model.recall(state, synchronous=synchronous, max_iterations=max_iterations,
+				history='compact', return_info=True, rng=np.random.default_rng(i))
+			iterations.append(info['iterations'])
+		return iterations
+
+	wall_time, peak, iterations = measure(recall, repeats)
+	return {'wall_time': wall_time, 'peak_memory': peak, 'iterations': int(sum(iterations))}
+
+def run_benchmarks(grids, kinds, cases, options, log=print):
+	"""
+	Wykonuje wszystkie kombinacje siatek, rodzajów wzorców i przypadków.
+
+	Returns
+	-------
+	dict
+		Wyniki w formacie pliku bazowego: wersja, środowisko, ustawienia
+		i lista wyników z kluczami 'grid', 'patterns' i 'case'.
+	"""
+	results = []
+	for grid in grids:
+		size = grid * grid
+		pattern_count = max(2, min(options['max_patterns'], int(options['load'] * size)))
+
+		for kind in kinds:
+			patterns = make_patterns(kind, pattern_count, grid, options['seed'], options['real_mnist'])
+			targets = patterns[:options['probes']]
+			probes = Probes.flip_noise(targets, options['noise'], np.random.default_rng([options['seed'], grid, 1]))
+
+			for case in cases:
+				result = {'grid': grid, 'patterns': kind, 'case': case, 'pattern_count': pattern_count}
+				result.update(run_case(case, patterns, probes, options))
+				results.append(result)
+
+				log(f"{grid:>4}x{grid:<4} {kind:<7} {case:<13} {result['wall_time'] * 1000:>10.2f} ms "
+					f"{result['peak_memory'] / 2 ** 20:>9.2f} MiB  iteracje: {result['iterations']}")
+
+	return {
+		'version': BASELINE_VERSION,
+		'environment': {
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'platform': platform.platform(),
+			'processor': platform.processor(),
+		},
+		'settings': {key: (str(value) if key == 'weight_dtype' else value) for key, value in options.items()},
+		'results': results,
+	}
+
+def result_key(result):
+	"""Klucz identyfikujący przypadek w pliku bazowym."""
+	return (result['grid'], result['patterns'], result['case'])
+
+def compare(current, baseline, time_tolerance=0.25, memory_tolerance=0.10):
+	"""
+	Porównuje wyniki z plikiem bazowym.
+
+	Regresją jest czas dłuższy o więcej niż time_tolerance (ułamek), pamięć
+	większa o więcej niż memory_tolerance lub inna liczba iteracji
+	odtwarzania (zmiana zachowania, nie tylko wydajności). Przypadki
+	nieobecne w pliku bazowym są pomijane.
+
+	Returns
+	-------
+	list of str
+		Opisy wykrytych regresji.
+	"""
+	if baseline.get('version') != BASELINE_VERSION:
+		raise ValueError(f"Nieobsługiwana wersja pliku bazowego: {baseline.get('version')}")
+
+	reference = {result_key(result): result for result in baseline['results']}
+	regressions = []
+	for result in current['results']:
+		base = reference.get(result_key(result))
+		if base is None:
+			continue
+
+		name = f"{result['grid']}x{result['grid']} {result['patterns']} {result['case']}"
+		if result['wall_time'] > base['wall_time'] * (1 + time_tolerance):
+			regressions.append(f"{name}: czas {base['wall_time'] * 1000:.2f} -> {result['wall_time'] * 1000:.2f} ms")
+		if result['peak_memory'] > base['peak_memory'] * (1 + memory_tolerance):
+			regressions.append(f"{name}: pamięć {base['peak_memory']} -> {result['peak_memory']} B")
+		if result['iterations'] != base['iterations']:
+			regressions.append(f"{name}: iteracje {base['iterations']} -> {result['iterations']}")
+
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmarki uczenia, energii i odtwarzania sieci Hopfielda")
+	parser.add_argument('--grids', type=int, nargs='+', default=[8, 16, 32, 64, 128], help="boki kwadratowych siatek")
+	parser.add_argument('--patterns', nargs='+', default=list(PATTERN_KINDS), choices=PATTERN_KINDS)
+	parser.add_argument('--cases', nargs='+', default=list(CASES), choices=CASES)
+	parser.add_argument('--real-mnist', action='store_true', help="prawdziwy Fashion-MNIST zamiast syntetycznych wzorców")
+	parser.add_argument('--weight-dtype', type=weight_dtype, default='int8', help="typ macierzy wag (int8 mieści siatkę 128x128 w 256 MiB)")
+	parser.add_argument('--load', type=float, default=0.05, help="liczba wzorców jako ułamek liczby neuronów")
+	parser.add_argument('--max-patterns', type=int, default=100)
+	parser.add_argument('--probes', type=int, default=3, help="liczba odtwarzanych wzorców testowych")
+	parser.add_argument('--noise', type=float, default=0.1, help="ułamek odwróconych pikseli wzorców testowych")
+	parser.add_argument('--max-iterations', type=int, default=10)
+	parser.add_argument('--repeats', type=int, default=3)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', help="zapisuje wyniki do pliku JSON (np. nowy plik bazowy)")
+	parser.add_argument('--baseline', help="plik bazowy JSON, z którym porównywane są wyniki")
+	parser.add_argument('--time-tolerance', type=float, default=0.25)
+	parser.add_argument('--memory-tolerance', type=float, default=0.10)
+	args = parser.parse_args()
+
+	options = {
+		'weight_dtype': args.weight_dtype,
+		'load': args.load,
+		'max_patterns': args.max_patterns,
+		'probes': args.probes,
+		'noise': args.noise,
+		'max_iterations': args.max_iterations,
+		'repeats': args.repeats,
+		'seed': args.seed,
+		'real_mnist': args.real_mnist,
+	}
+	current = run_benchmarks(args.grids, args.patterns, args.cases, options)
+
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(current, f, indent=2)
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			baseline = json.load(f)
+		regressions = compare(current, baseline, args.time_tolerance, args.memory_tolerance)
+		for regression in regressions:
+			print(f"REGRESJA {regression}")
+		if regressions:
+			sys.exit(1)
+		print("Brak regresji względem pliku bazowego")
+
+if __name__ == "__main__":
+	main()
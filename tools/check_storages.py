@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from WeightStorage import STORAGES, SparseWeights
+
+#	Sprawdzenie zgodności jąder magazynów wag z pełną macierzą z to_dense():
+#	matvec, matmat, column i columns_dot. Przypadki obejmują rzadkie struktury
+#	z pustymi wierszami na początku, w środku i na końcu. Niezgodności kończą
+#	program kodem 1.
+
+def sparse_with_empty_rows(size, rng):
+	"""Losowa symetryczna struktura, w której co trzeci neuron i ostatnie dwa nie mają połączeń."""
+	connected = np.setdiff1d(np.arange(1, size - 2), np.arange(0, size, 3))
+	pairs = rng.choice(connected, size=(3 * len(connected), 2))
+	pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+	pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+	rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+	cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+	return SparseWeights._from_edges(size, rows, cols, None)
+
+def storages(patterns, rng):
+	"""Zwraca pary (nazwa, magazyn) wytrenowane na wzorcach."""
+	size = patterns.shape[1]
+	result = [(kind, STORAGES[kind](size)) for kind in STORAGES]
+	result += [
+		('sparse-pruned', SparseWeights.pruned(patterns, 0.05)),
+		('sparse-local', SparseWeights.local((4, size // 4), 1.5)),
+		('sparse-empty-rows', sparse_with_empty_rows(size, rng)),
+	]
+
+	# Trójkąt neuronów 0-2 i odizolowany neuron 3 (pusty ostatni wiersz)
+	triangle = SparseWeights._from_edges(4, np.array([0, 1, 0, 2, 1, 2]), np.array([1, 0, 2, 0, 2, 1]), None)
+	triangle.data[:] = 1
+
+	for name, storage in result:
+		storage.add_gram(patterns)
+		storage.zero_diagonal()
+	return result + [('sparse-triangle', triangle)]
+
+def check(name, storage, rng):
+	"""Zwraca listę opisów niezgodności jąder magazynu."""
+	size = storage.size
+	dense = storage.to_dense().astype(np.float64)
+	states = rng.choice([-1.0, 1.0], size=(5, size))
+	idx = rng.permutation(size)[:max(1, size // 3)]
+	deltas = rng.choice([-2.0, 2.0], size=len(idx))
+
+	errors = []
+	if not np.allclose(storage.matvec(states[0]), dense @ states[0]):
+		errors.append(f"{name}: matvec")
+	if not np.allclose(storage.matmat(states), states @ dense.T):
+		errors.append(f"{name}: matmat")
+	if not np.allclose(storage.column(idx[0]), dense[:, idx[0]]):
+		errors.append(f"{name}: column")
+	if not np.allclose(storage.columns_dot(idx, deltas), dense[:, idx] @ deltas):
+		errors.append(f"{name}: columns_dot")
+	return errors
+
+def main(seeds=20, size=48, pattern_count=6):
+	errors = []
+	for seed in range(seeds):
+		rng = np.random.default_rng(seed)
+		patterns = rng.choice([-1.0, 1.0], size=(pattern_count, size))
+		for name, storage in storages(patterns, rng):
+			errors += [f"ziarno {seed}, {error}" for error in check(name, storage, rng)]
+
+	for error in errors:
+		print(f"NIEZGODNOŚĆ {error}")
+	if errors:
+		sys.exit(1)
+	print(f"Jądra wszystkich magazynów zgodne z pełną macierzą ({seeds} ziaren)")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,61 @@
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import ModelFile
+import ModelIO
+from cli import weight_dtype
+
+#	Konwersja modeli zapisanych jako pickle (.pkl) do formatu binarnego
+#	ModelFile (.hop). Domyślnie konwertowane są wszystkie modele
+#	z example_models/. Każdy skonwertowany model jest wczytywany ponownie
+#	i porównywany z oryginałem.
+
+EXAMPLE_MODELS = os.path.join(os.path.dirname(__file__), '..', 'example_models', '*.pkl')
+
+def convert(path, output=None, weight_dtype=None, include_weights=True, compression=None):
+	"""
+	Konwertuje jeden plik modelu i sprawdza wynik.
+
+	Returns
+	-------
+	str
+		Ścieżka zapisanego pliku.
+	"""
+	output = output or os.path.splitext(path)[0] + ModelFile.MODEL_EXTENSION
+
+	patterns, model = ModelIO.load_model(path)
+	ModelIO.save_model(output, patterns, model, weight_dtype=weight_dtype, include_weights=include_weights, compression=compression)
+
+	# Rzeczywiste wagi i wzorce muszą się zgadzać (z dokładnością do typu
+	# wag). Bez wag zgodność oznacza, że model powstał z uczenia na wzorcach.
+	converted_patterns, converted = ModelIO.load_model(output, mmap=False)
+	original_weights = model.weight_scale * model.storage.to_dense()
+	converted_weights = converted.weight_scale * converted.storage.to_dense()
+	if not np.array_equal(patterns.to_array(), converted_patterns.to_array()) or not np.allclose(original_weights, converted_weights, atol=1e-6):
+		os.remove(output)
+		raise ValueError(f"{path}: skonwertowany model różni się od oryginału")
+
+	return output
+
+def main():
+	parser = argparse.ArgumentParser(description="Konwersja modeli .pkl do formatu binarnego .hop")
+	parser.add_argument('paths', nargs='*', help="pliki .pkl (domyślnie example_models/*.pkl)")
+	parser.add_argument('--weight-dtype', type=weight_dtype, help="typ zapisywanych wag, np. int8 lub float32")
+	parser.add_argument('--no-weights', action='store_true', help="zapisuje tylko wzorce, wagi są liczone przy wczytaniu")
+	parser.add_argument('--compress', action='store_true', help="kompresja zlib")
+	args = parser.parse_args()
+
+	paths = args.paths or sorted(glob.glob(EXAMPLE_MODELS))
+	for path in paths:
+		output = convert(path, weight_dtype=args.weight_dtype, include_weights=not args.no_weights,
+			compression='zlib' if args.compress else None)
+		print(f"{path} ({os.path.getsize(path)} B) -> {output} ({os.path.getsize(output)} B)")
+
+if __name__ == "__main__":
+	main()
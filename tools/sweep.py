@@ -0,0 +1,190 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import zlib
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import ModelIO
+import Probes
+from Hopfield import Hopfield
+
+#	Przegląd pojemności i odporności na szum bez interfejsu graficznego.
+#	Dla każdej kombinacji liczby wzorców, ziarna, trybu odtwarzania,
+#	zniekształcenia i jego poziomu zapisuje jeden wiersz wyników w pliku CSV.
+#	Wiersze zapisywane są od razu, a ponowne uruchomienie z tym samym plikiem
+#	pomija kombinacje, które już w nim są (z tymi samymi ustawieniami
+#	przeglądu). Wzorce testowe zależą tylko od wartości parametrów, nie od
+#	ich kolejności w wierszu poleceń.
+
+# Kolumny ustawień przeglądu, od których zależą wyniki
+SETTING_COLUMNS = ['shape', 'patterns', 'probes_per_pattern', 'iteration_limit']
+
+# Kolumny identyfikujące kombinację parametrów
+KEY_COLUMNS = SETTING_COLUMNS + ['pattern_count', 'seed', 'mode', 'corruption', 'level']
+
+COLUMNS = KEY_COLUMNS + ['probes', 'mean_overlap', 'success_rate', 'mean_iterations', 'max_iterations']
+
+def load_patterns(path, shape, count, rng):
+	"""Zwraca count wzorców z pliku modelu (.hop lub .pkl) lub losowych wzorców o kształcie shape."""
+	if path is None:
+		return rng.choice(np.array([-1, 1], dtype=np.int8), size=(count,) + tuple(shape))
+
+	patterns = np.asarray(ModelIO.load_model_data(path)['patterns'], dtype=np.int8)
+	if count > len(patterns):
+		raise ValueError(f"Plik {path} zawiera tylko {len(patterns)} wzorców")
+
+	return patterns[rng.permutation(len(patterns))[:count]]
+
+def recall_probes(model, probes, mode, max_iterations, seed):
+	"""
+	Odtwarza wzorce testowe i zwraca stany końcowe oraz liczby iteracji.
+
+	Tryb 'sync' używa recall_batch (jedno mnożenie macierzy na iterację dla
+	całej partii), tryby 'async' i 'block:k' odtwarzają wzorce po kolei.
+	"""
+	matrix = probes.reshape(len(probes), -1)
+	if mode == 'sync':
+		states, iterations, energies = model.recall_batch(matrix, max_iterations=max_iterations)
+		return states, iterations
+
+	block_size = int(mode.split(':')[1]) if mode.startswith('block:') else 1
+	rngs = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(len(matrix))]
+
+	states = np.empty_like(matrix)
+	iterations = np.empty(len(matrix), dtype=int)
+	for i, (probe, rng) in enumerate(zip(matrix, rngs)):
+		states_history, energy_history, info = model.recall(probe, synchronous=False, max_iterations=max_iterations,
+			history='compact', block_size=block_size, return_info=True, rng=rng)
+		states[i] = states_history[-1]
+		iterations[i] = info['iterations']
+	return states, iterations
+
+def read_done(path):
+	"""Zwraca zbiór kluczy kombinacji zapisanych już w pliku wyników."""
+	if not os.path.exists(path):
+		return set()
+
+	with open(path, newline='') as f:
+		reader = csv.DictReader(f)
+		if reader.fieldnames != COLUMNS:
+			raise ValueError(f"Plik {path} ma inne kolumny niż wyniki przeglądu - podaj nowy plik")
+		return {tuple(row[column] for column in KEY_COLUMNS) for row in reader}
+
+def probe_seed(seed, pattern_count, mode, corruption, level):
+	"""Zwraca ziarno wzorców testowych wyznaczone z wartości parametrów."""
+	return [seed, pattern_count, zlib.crc32(f"{mode}/{corruption}/{level}".encode())]
+
+def corruption_levels(corruption, levels, shift_levels):
+	"""Zwraca poziomy zniekształcenia: przesunięcia w pikselach, pozostałe jako ułamki."""
+	return shift_levels if corruption == 'shift' else levels
+
+def run_sweep(output, pattern_counts, seeds, modes, corruptions, levels, shape=(16, 16), patterns_path=None, probes_per_pattern=10, max_iterations=20, shift_levels=(0, 1, 2, 3)):
+	"""
+	Wykonuje przegląd parametrów, dopisując wyniki do pliku CSV.
+
+	Parameters
+	----------
+	output : str
+		Ścieżka pliku wyników.
+	pattern_counts, seeds : iterable of int
+		Liczby zapamiętanych wzorców i ziarna losowania.
+	modes : iterable of str
+		Tryby odtwarzania: 'sync', 'async' lub 'block:k'.
+	corruptions : iterable of str
+		Rodzaje zniekształceń z Probes.CORRUPTIONS.
+	levels : iterable of float
+		Poziomy zniekształceń 'flip' i 'occlude' (ułamek pikseli/powierzchni).
+	shape : tuple of int, default (16, 16)
+		Kształt losowych wzorców.
+	patterns_path : str, optional
+		Plik modelu (.hop lub .pkl), z którego losowane są wzorce zamiast losowych.
+	probes_per_pattern : int, default 10
+		Liczba zniekształconych wersji każdego wzorca.
+	max_iterations : int, default 20
+		Maksymalna liczba iteracji odtwarzania.
+	shift_levels : iterable of int, default (0, 1, 2, 3)
+		Największe przesunięcia 'shift' w pikselach.
+	"""
+	modes, corruptions, levels, shift_levels = list(modes), list(corruptions), list(levels), list(shift_levels)
+	settings = {
+		'shape': 'x'.join(map(str, shape)),
+		'patterns': patterns_path or '',
+		'probes_per_pattern': probes_per_pattern,
+		'iteration_limit': max_iterations,
+	}
+	setting_key = tuple(str(settings[column]) for column in SETTING_COLUMNS)
+
+	done = read_done(output)
+	new_file = not os.path.exists(output)
+
+	with open(output, 'a', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=COLUMNS)
+		if new_file:
+			writer.writeheader()
+
+		for pattern_count, seed in itertools.product(pattern_counts, seeds):
+			combinations = [
+				(mode, corruption, level) for mode, corruption in itertools.product(modes, corruptions)
+				for level in corruption_levels(corruption, levels, shift_levels)
+				if setting_key + tuple(map(str, (pattern_count, seed, mode, corruption, level))) not in done
+			]
+			if not combinations:
+				continue
+
+			rng = np.random.default_rng(seed)
+			patterns = load_patterns(patterns_path, shape, pattern_count, rng)
+			model = Hopfield(patterns[0].size)
+			model.train(patterns)
+
+			targets = np.repeat(patterns, probes_per_pattern, axis=0)
+			clean = targets.reshape(len(targets), -1)
+
+			for mode, corruption, level in combinations:
+				task_seed = probe_seed(seed, pattern_count, mode, corruption, level)
+				probes = Probes.CORRUPTIONS[corruption](targets, level, np.random.default_rng(task_seed))
+				states, iterations = recall_probes(model, probes, mode, max_iterations, task_seed)
+
+				overlaps = np.mean(states * clean, axis=1)
+				writer.writerow({
+					**settings,
+					'pattern_count': pattern_count,
+					'seed': seed,
+					'mode': mode,
+					'corruption': corruption,
+					'level': level,
+					'probes': len(probes),
+					'mean_overlap': round(float(np.mean(overlaps)), 6),
+					'success_rate': round(float(np.mean(np.all(states == clean, axis=1))), 6),
+					'mean_iterations': round(float(np.mean(iterations)), 3),
+					'max_iterations': int(np.max(iterations)),
+				})
+				f.flush()
+
+				print(f"P={pattern_count} seed={seed} {mode} {corruption} {level}: overlap {np.mean(overlaps):.3f}")
+
+def main():
+	parser = argparse.ArgumentParser(description="Przegląd pojemności i odporności sieci Hopfielda na zniekształcenia")
+	parser.add_argument('output', help="plik CSV z wynikami (dopisywany, można wznowić przerwany przegląd)")
+	parser.add_argument('--pattern-counts', type=int, nargs='+', default=[5, 10, 20, 40])
+	parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+	parser.add_argument('--modes', nargs='+', default=['sync', 'async'], help="sync, async lub block:k")
+	parser.add_argument('--corruptions', nargs='+', default=['flip'], choices=sorted(Probes.CORRUPTIONS))
+	parser.add_argument('--levels', type=float, nargs='+', default=[0.0, 0.1, 0.2, 0.3, 0.4], help="ułamek pikseli (flip) lub powierzchni (occlude)")
+	parser.add_argument('--shift-levels', type=int, nargs='+', default=[0, 1, 2, 3], help="największe przesunięcie w pikselach (shift)")
+	parser.add_argument('--shape', type=int, nargs=2, default=[16, 16], metavar=('WYS', 'SZER'))
+	parser.add_argument('--patterns', help="plik modelu .hop lub .pkl, z którego brane są wzorce")
+	parser.add_argument('--probes-per-pattern', type=int, default=10)
+	parser.add_argument('--max-iterations', type=int, default=20)
+	args = parser.parse_args()
+
+	run_sweep(args.output, args.pattern_counts, args.seeds, args.modes, args.corruptions, args.levels,
+		shape=args.shape, patterns_path=args.patterns, probes_per_pattern=args.probes_per_pattern,
+		max_iterations=args.max_iterations, shift_levels=args.shift_levels)
+
+if __name__ == "__main__":
+	main()
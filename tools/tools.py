@@ -13,21 +13,14 @@ def calculate_hamming_distances(patterns):
 		return None
 		
 	n_patterns = len(patterns)
-	pattern_size = patterns[0].size
 	
-	# Spłaszcz wzorce do wektorów
-	patterns = [p.flatten() for p in patterns]
+	# Spłaszcz wzorce do macierzy (P, N), float zapobiega przepełnieniu int8
+	patterns = np.asarray(patterns, dtype=float).reshape(n_patterns, -1)
+	pattern_size = patterns.shape[1]
 	
 	# Macierz odległości
-	distances = np.zeros((n_patterns, n_patterns))
-	
-	for i in range(n_patterns):
-		for j in range(n_patterns):
-			if i == j:
-				distances[i, j] = 0.0
-			else:
-				distance_in_bits = (pattern_size - np.dot(patterns[i], patterns[j])) / 2
-				distances[i, j] = distance_in_bits / pattern_size
+	distances = (pattern_size - np.dot(patterns, patterns.T)) / 2 / pattern_size
+	np.fill_diagonal(distances, 0.0)
 	
 	return distances
 
@@ -128,7 +121,7 @@ def print_hamming_distances():
 	# Następnie import z aplikacji:
 	import MNISTLoader
 
-	patterns = MNISTLoader.load_fashion_mnist_patterns(parent=None, num_patterns=5, target_size=(28, 28))
+	patterns = MNISTLoader.load_fashion_mnist_patterns(num_patterns=5, target_size=(28, 28))
 
 	print(calculate_hamming_distances(patterns))
 